@@ -7,28 +7,260 @@ d_pilot, d_destination).
 
 # import the sqlite3 package
 import sqlite3
+# import chain to flatten the rows into one list of parameters and compress to filter out duplicate rows
+from itertools import chain, compress
+
+# INSERT statements generated by _insert_sql(), keyed by table name and number of rows.
+_INSERT_SQL = {}
+
+# Sample pilots to be inserted to the d_pilot table, held as one list per column (in table order).
+_PILOTS = {
+    'pilot_ID': ['P0010001', 'P0010002', 'P0010003', 'P0010004', 'P0010005', 'P0010006', 'P0010007', 'P0010008',
+                 'P0010009', 'P0010010'],
+    'first_name': ['Bhaagyashree', 'Jo', 'Christina', 'Zach', 'Raghubir', 'Matthew', 'James', 'Paola', 'Ben', 'Neil'],
+    'last_name': ['Patil', 'Hyde', 'Keating', 'Lyons', 'Singh', 'Albertyn', 'Davenport', 'Bruscoli', 'Ralph',
+                  'Langmead'],
+    'licence_number': ['ATPL8954', 'ATPL5235', 'ATPL8648', 'CPL85695', 'CPL64585', 'CPL89563', 'CPL85685', 'ATPL5684',
+                       'CPL58695', 'ATPL2135'],
+    'licence_expiry': ['2026-03-31', '2027-01-26', '2025-09-03', '2026-02-28', '2025-10-15', '2026-08-22', '2025-12-17',
+                       '2026-11-01', '2026-05-08', '2025-06-30'],
+    'night_flag': [1, 1, 0, 1, 0, 1, 1, 1, 0, 1]
+}
+
+# Sample destinations to be inserted to the d_destination table.
+_DESTINATIONS = {
+    'destination_code': ['DUB', 'EMA', 'BHX', 'NWI', 'BRS', 'EXE', 'SOU', 'GCI', 'JER', 'NCL', 'CDG', 'BIO', 'MUC',
+                         'VRN', 'PMI'],
+    'airport_name': ['Dublin International', 'East Midlands', 'Birmingham Airport', 'Norwich International',
+                     'Bristol Airport', 'Exeter Airport', 'Southampton Airport', 'Guernsey Airport', 'Jersey Airport',
+                     'Newcastle International', 'Charles de Gaulle', 'Bilbao Airport', 'Munich International',
+                     'Verona Villafranca Airport', 'Palma de Mallorca Airport'],
+    'city': ['Dublin', 'Nottingham', 'Birmingham', 'Norwich', 'Bristol', 'Exeter', 'Southampton', 'Guernsey', 'Jersey',
+             'Newcastle', 'Paris', 'Bilbao', 'Munich', 'Verona', 'Palma de Mallorca'],
+    'country': ['Ireland', 'England', 'England', 'England', 'England', 'England', 'England', 'Channel Islands',
+                'Channel Islands', 'England', 'France', 'Spain', 'Germany', 'Italy', 'Spain']
+}
+
+# Sample flights to be inserted to the d_flight table.
+_FLIGHTS = {
+    'flight_ID': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+    'flight_number': ['SI2206', 'SI3350', 'SI3351', 'SI5580', 'SI2206', 'SI2207', 'SI2203', 'SI2202', 'SI5552',
+                      'SI5581', 'SI3312', 'SI3328', 'SI3342', 'SI3329', 'SI3313'],
+    'departure_destination_code': ['GCI', 'JER', 'SOU', 'JER', 'JER', 'EXE', 'EXE', 'JER', 'GCI', 'DUB', 'GCI', 'GCI',
+                                   'GCI', 'SOU', 'SOU'],
+    'arrival_destination_code': ['JER', 'SOU', 'JER', 'DUB', 'EXE', 'JER', 'JER', 'EXE', 'JER', 'JER', 'SOU', 'SOU',
+                                 'SOU', 'GCI', 'GCI'],
+    'scheduled_departure_time': ['08:30:00', '07:15:00', '08:35:00', '10:35:00', '09:20:00', '10:45:00', '08:35:00',
+                                 '07:20:00', '12:45:00', '13:00:00', '10:00:00', '13:50:00', '18:20:00', '15:05:00',
+                                 '11:15:00'],
+    'scheduled_arrival_time': ['08:50:00', '08:05:00', '09:25:00', '12:20:00', '10:05:00', '11:30:00', '09:20:00',
+                               '08:05:00', '13:05:00', '14:45:00', '10:45:00', '14:35:00', '19:05:00', '15:50:00',
+                               '12:00:00']
+}
+
+# Sample scheduled flights to be inserted to the f_schedule table.
+_SCHEDULE = {
+    'schedule_ID': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11],
+    'departure_date': ['2025-04-21', '2025-04-21', '2025-04-21', '2025-04-21', '2025-04-06', '2025-04-06', '2025-04-07',
+                       '2025-04-07', '2025-04-08', '2025-04-09', '2025-04-29'],
+    'actual_departure_time': [None] * 11,
+    'actual_arrival_time': [None] * 11,
+    'flight_ID': [2, 3, 5, 6, 7, 8, 4, 10, 9, 1, 2],
+    'pilot_ID': ['P0010001', 'P0010001', 'P0010002', 'P0010002', 'P0010002', 'P0010002', 'P0010003', 'P0010003',
+                 'P0010004', None, None],
+    'status': ['scheduled', 'scheduled', 'scheduled', 'scheduled', 'landed', 'landed', 'landed', 'landed', 'landed',
+               'cancelled', 'scheduled']
+}
+
+# Settings applied to every connection by open_connection(). Write-Ahead Logging means writers don't block readers
+# and commits need fewer fsyncs; synchronous=NORMAL is crash-safe under WAL and avoids an fsync on every commit. The
+# whole dataset is kept in a 64 MiB page cache, temporary tables are held in memory and pages are read via mmap.
+# Foreign keys are enforced (relationships between the tables).
+_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA cache_size=-65536;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA foreign_keys=ON;
+"""
 
-
-def open_connection():
-    """ Connects to the flight.db database, creating it if it doesn't
-     already exist. Returns a connection and cursor.
+# Script to create the 3 dimension tables, the fact table and the indexes on their foreign key columns. SQLite doesn't
+# index foreign key columns automatically, so without the indexes every join and foreign key check against f_schedule
+# or d_flight would scan the whole table.
+_DDL_SCRIPT = '''
+-- Destination lookup table.
+CREATE TABLE IF NOT EXISTS d_destination (
+destination_code TEXT PRIMARY KEY NOT NULL,
+airport_name TEXT NOT NULL,
+city TEXT NOT NULL,
+country TEXT NOT NULL
+) STRICT;
+
+-- Pilot lookup table.
+CREATE TABLE IF NOT EXISTS d_pilot (
+pilot_ID TEXT PRIMARY KEY NOT NULL,
+first_name TEXT NOT NULL,
+last_name TEXT NOT NULL,
+licence_number TEXT NOT NULL,
+licence_expiry TEXT NOT NULL,
+night_flag INTEGER NOT NULL
+) STRICT;
+
+-- Flight lookup table.
+CREATE TABLE IF NOT EXISTS d_flight (
+flight_ID INTEGER PRIMARY KEY,
+flight_number TEXT NOT NULL,
+departure_destination_code TEXT NOT NULL,
+arrival_destination_code TEXT NOT NULL,
+scheduled_departure_time TEXT NOT NULL,
+scheduled_arrival_time TEXT NOT NULL,
+FOREIGN KEY(departure_destination_code) REFERENCES d_destination(destination_code),
+FOREIGN KEY(arrival_destination_code) REFERENCES d_destination(destination_code)
+) STRICT;
+
+-- Schedule fact table.
+CREATE TABLE IF NOT EXISTS f_schedule (
+schedule_ID INTEGER PRIMARY KEY,
+departure_date TEXT NOT NULL,
+actual_departure_time TEXT,
+actual_arrival_time TEXT,
+flight_ID INTEGER NOT NULL,
+pilot_ID TEXT,
+status TEXT NOT NULL,
+FOREIGN KEY(flight_ID) REFERENCES d_flight(flight_ID),
+FOREIGN KEY(pilot_ID) REFERENCES d_pilot(pilot_ID)
+) STRICT;
+
+-- Foreign key indexes. The flight_ID index also covers departure_date, so finding a flight's schedule on a given date
+-- (as when assigning a pilot) is a single seek.
+CREATE INDEX IF NOT EXISTS ix_schedule_flight_date ON f_schedule(flight_ID, departure_date);
+CREATE INDEX IF NOT EXISTS ix_fs_pilot ON f_schedule(pilot_ID);
+CREATE INDEX IF NOT EXISTS ix_df_dep ON d_flight(departure_destination_code);
+CREATE INDEX IF NOT EXISTS ix_df_arr ON d_flight(arrival_destination_code);
+
+-- Number of flights scheduled for each pilot, used by the flights per pilot summary.
+CREATE VIEW IF NOT EXISTS v_pilot_counts AS
+    SELECT pilot_id, COUNT(*) AS flight_count
+    FROM f_schedule
+    WHERE pilot_id IS NOT NULL
+    GROUP BY pilot_id;
+'''
+
+# Connections and cursors shared by the setup functions, keyed by database path. Created by open_connection() and
+# closed by shutdown().
+_CONNECTIONS = {}
+
+
+def open_connection(path='flight.db'):
+    """ Connects to the database at path (flight.db by default), creating it if it doesn't
+     already exist. The path may also be a URI, e.g. 'file::memory:?cache=shared' for a
+     database held in memory. The connection is cached, so running create_database_tables()
+     and load_sample_data() back-to-back only opens the database once.
+     Returns a connection and cursor.
      """
-    # Open a database connection & create flight.db database if non-existent.
-    connection = sqlite3.connect('flight.db', isolation_level=None)
+    # Reuse the cached connection if one is already open.
+    if path in _CONNECTIONS:
+        return _CONNECTIONS[path]
+
+    # Open a database connection & create the database if non-existent.
+    # A larger statement cache ensures the INSERT statements are never evicted between loads.
+    connection = sqlite3.connect(path, cached_statements=256, uri=True)
 
     # Create a database cursor to query the database.
     cursor = connection.cursor()
+
+    # Apply the connection settings in one call.
+    cursor.executescript(_PRAGMAS)
+
+    # Cache the connection and cursor for the next setup function.
+    _CONNECTIONS[path] = connection, cursor
     return connection, cursor
 
 
 def close_connection(connection, cursor):
-    """ Closes the cursor and connection to the flight.db database"""
+    """ Closes the cursor and connection to the database. Runs PRAGMA optimize first, so the query planner
+    statistics (sqlite_stat1) are kept up to date as the tables grow.
+    """
+    # Let SQLite refresh the planner statistics for any tables that have changed significantly.
+    cursor.execute('PRAGMA optimize')
+
     # close the cursor
     cursor.close()
 
     # close the connection to free resources used by the database
     connection.close()
 
+    # Forget the cached connection if that was the one closed.
+    for path, cached in list(_CONNECTIONS.items()):
+        if cached[0] is connection:
+            del _CONNECTIONS[path]
+
+
+def shutdown():
+    """ Closes every cached database connection (running PRAGMA optimize first)."""
+    for connection, cursor in list(_CONNECTIONS.values()):
+        close_connection(connection, cursor)
+
+
+def _insert_sql(cursor, table, row_count):
+    """ Returns an INSERT OR IGNORE statement for row_count rows of the table, e.g.
+    INSERT OR IGNORE INTO t (a,b) VALUES (?,?),(?,?). The column list is read from PRAGMA table_info,
+    so it always matches the table definition. Each statement is built once per table and row count and then
+    reused, so the same text is found in sqlite3's statement cache. table is a name from this module, never user input.
+    """
+    key = (table, row_count)
+    if key not in _INSERT_SQL:
+        # Column names, in table order, are the second field of each table_info row.
+        columns = [column[1] for column in cursor.execute(f"PRAGMA table_info({table})")]
+        # One group of placeholders per row, e.g. (?,?,?) for a three column table.
+        row_placeholders = "(" + ",".join(["?"] * len(columns)) + ")"
+        _INSERT_SQL[key] = (f"INSERT OR IGNORE INTO {table} ({','.join(columns)}) VALUES "
+                            + ",".join([row_placeholders] * row_count))
+    return _INSERT_SQL[key]
+
+
+def _bulk_insert(cursor, table, columns):
+    """ Inserts sample data into the table with a single multi-row INSERT statement (see _insert_sql), so the
+    statement is bound and stepped once rather than once per row. columns maps each column name to its list of values,
+    with every column present, in table order.
+    """
+    # zip yields one row tuple at a time from the column lists; flatten them so each value binds to its placeholder.
+    row_count = len(next(iter(columns.values())))
+    cursor.execute(_insert_sql(cursor, table, row_count), list(chain.from_iterable(zip(*columns.values()))))
+
+
+def _bulk_insert_all(cursor):
+    """ Inserts the sample data for all four tables using the cursor's current transaction. Before each insert, one
+    SELECT looks up which primary keys already exist; those rows are skipped and their keys reported to the user.
+    """
+    # Check foreign keys once at COMMIT rather than on every inserted row. SQLite resets this afterwards.
+    cursor.execute("PRAGMA defer_foreign_keys = ON")
+
+    # Use of ? protects against SQL injection attack, with the execute method
+    # replacing ? with the variable values. Each table is inserted with one multi-row INSERT.
+    for table, columns in (('d_pilot', _PILOTS), ('d_destination', _DESTINATIONS), ('d_flight', _FLIGHTS),
+                           ('f_schedule', _SCHEDULE)):
+        # The first column of each sample table is its primary key.
+        primary_key, keys = next(iter(columns.items()))
+
+        # Find the keys that are already in the database with a single lookup.
+        placeholders = ",".join(["?"] * len(keys))
+        existing = {row[0] for row in cursor.execute(
+            f"SELECT {primary_key} FROM {table} WHERE {primary_key} IN ({placeholders})", keys)}
+
+        # Report the duplicates and leave their rows out of the insert.
+        if existing:
+            duplicates = [key for key in keys if key in existing]
+            print(f"{len(duplicates)} of {len(keys)} rows for {table} already exist in the database and were skipped "
+                  f"({primary_key}: {', '.join(map(str, duplicates))}).")
+            keep = [key not in existing for key in keys]
+            columns = {name: list(compress(values, keep)) for name, values in columns.items()}
+
+        # Insert whatever is left.
+        if len(columns[primary_key]) > 0:
+            _bulk_insert(cursor, table, columns)
+
 
 # def drop_all_tables():
 #     """ Deletes the 4 sample database tables. Commented out for safety."""
@@ -47,220 +279,46 @@ def close_connection(connection, cursor):
 #     close_connection(connection, cursor)
 
 
-def create_database_tables():
+def create_database_tables(path='flight.db'):
     """ Connects to the database to create 3 dimension tables (d_pilot,
     d_flight, d_destination) and the fact table(f_schedule). Relationships are
     created between the fact table and pilot & flight tables as well as between
-    the destination and flight tables. Tables are created in strict mode, where
-    every column must have a datatype. Raises an integrity error exception if
-    the wrong type is entered into a table.
+    the destination and flight tables, with an index on each foreign key column.
+    Tables are created in strict mode, where every column must have a datatype.
+    Raises an integrity error exception if the wrong type is entered into a table.
+    The database path defaults to flight.db (see open_connection).
     """
     # Open connection to the database & create cursor.
-    connection, cursor = open_connection()
+    connection, cursor = open_connection(path)
+
+    # Create the 4 tables and their indexes (foreign keys are already enabled by open_connection). Sent to SQLite as
+    # one script; each statement commits as it runs, so no commit is needed.
+    cursor.executescript(_DDL_SCRIPT)
 
-    # Script to create the Pilot lookup table.
-    table_schema_pilot = '''
-    CREATE TABLE IF NOT EXISTS d_pilot (
-    pilot_ID TEXT PRIMARY KEY NOT NULL,
-    first_name TEXT NOT NULL,
-    last_name TEXT NOT NULL,
-    licence_number TEXT NOT NULL,
-    licence_expiry TEXT NOT NULL,
-    night_flag INTEGER NOT NULL
-    ) STRICT; 
-    '''
-
-    # Script to create the flight lookup table.
-    table_schema_flight = '''
-    CREATE TABLE IF NOT EXISTS d_flight (
-    flight_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    flight_number TEXT NOT NULL,
-    departure_destination_code TEXT NOT NULL,
-    arrival_destination_code TEXT NOT NULL,
-    scheduled_departure_time TEXT NOT NULL,
-    scheduled_arrival_time TEXT NOT NULL,
-    FOREIGN KEY(departure_destination_code) REFERENCES d_destination(destination_code),
-    FOREIGN KEY(arrival_destination_code) REFERENCES d_destination(destination_code)
-    ) STRICT;
-    '''
-
-    # Script to create the destination lookup table.
-    table_schema_destination = '''
-    CREATE TABLE IF NOT EXISTS d_destination (
-    destination_code TEXT PRIMARY KEY NOT NULL,
-    airport_name TEXT NOT NULL,
-    city TEXT NOT NULL,
-    country TEXT NOT NULL
-    ) STRICT;
-    '''
-
-    # Script to create the schedule fact table.
-    table_schema_schedule = '''
-    CREATE TABLE IF NOT EXISTS f_schedule (
-    schedule_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    departure_date TEXT NOT NULL,
-    actual_departure_time TEXT,
-    actual_arrival_time TEXT,
-    flight_ID INTEGER NOT NULL,
-    pilot_ID TEXT,
-    status TEXT NOT NULL,
-    FOREIGN KEY(flight_ID) REFERENCES d_flight(flight_ID),
-    FOREIGN KEY(pilot_ID) REFERENCES d_pilot(pilot_ID)
-    ) STRICT;
-    '''
-
-    # Allow creation of relationships (primary and foreign keys).
-    cursor.execute('PRAGMA foreign_keys = ON')
-
-    # Command creates the 4 tables, using the previously created scripts.
-    cursor.execute(table_schema_destination)
-    cursor.execute(table_schema_pilot)
-    cursor.execute(table_schema_flight)
-    cursor.execute(table_schema_schedule)
-
-    # Commit changes to the database.
-    connection.commit()
-
-    # Close cursor and connection to the database.
-    close_connection(connection, cursor)
-
-
-def load_sample_data():
+
+def load_sample_data(path='flight.db'):
     """Loads sample data into the database tables (d_destination, d_flight,
      d_pilot, f_schedule). Protects against SQL injection using parameterised
-     queries. Exception included to catch duplicate primary key entries.
+     queries. All four inserts run in a single transaction. Rows that already exist (duplicate primary keys) are
+     skipped and their keys reported. Foreign keys are checked once, when the load is committed, along with
+     anything else already pending in the connection's transaction. The database path defaults to flight.db (see
+     open_connection).
      """
     # Open connection to the database & create cursor.
-    connection, cursor = open_connection()
-
-    # create an object pilots to be inserted to the d_pilots table.
-    pilots = [('P0010001', 'Bhaagyashree', 'Patil', 'ATPL8954', "2026-03-31", 1),
-              ('P0010002', 'Jo', 'Hyde', 'ATPL5235', "2027-01-26", 1),
-              ('P0010003', 'Christina', 'Keating', 'ATPL8648', "2025-09-03", 0),
-              ('P0010004', 'Zach', 'Lyons', 'CPL85695', "2026-02-28", 1),
-              ('P0010005', 'Raghubir', 'Singh', 'CPL64585', "2025-10-15", 0),
-              ('P0010006', 'Matthew', 'Albertyn', 'CPL89563', "2026-08-22", 1),
-              ('P0010007', 'James', 'Davenport', 'CPL85685', "2025-12-17", 1),
-              ('P0010008', 'Paola', 'Bruscoli', 'ATPL5684', "2026-11-01", 1),
-              ('P0010009', 'Ben', 'Ralph', 'CPL58695', "2026-05-08", 0),
-              ('P0010010', 'Neil', 'Langmead', 'ATPL2135', "2025-06-30", 1)
-              ]
-
-    # create an object destination to be inserted to the d_destination table.
-    destinations = [('DUB', 'Dublin International', 'Dublin', 'Ireland'),
-                    ('EMA', 'East Midlands', 'Nottingham', 'England'),
-                    ('BHX', 'Birmingham Airport', 'Birmingham', 'England'),
-                    ('NWI', 'Norwich International', 'Norwich', 'England'),
-                    ('BRS', 'Bristol Airport', 'Bristol', 'England'),
-                    ('EXE', 'Exeter Airport', 'Exeter', 'England'),
-                    ('SOU', 'Southampton Airport', 'Southampton', 'England'),
-                    ('GCI', 'Guernsey Airport', 'Guernsey', 'Channel Islands'),
-                    ('JER', 'Jersey Airport', 'Jersey', 'Channel Islands'),
-                    ('NCL', 'Newcastle International', 'Newcastle', 'England'),
-                    ('CDG', 'Charles de Gaulle', 'Paris', 'France'),
-                    ('BIO', 'Bilbao Airport', 'Bilbao', 'Spain'),
-                    ('MUC', 'Munich International', 'Munich', 'Germany'),
-                    ('VRN', 'Verona Villafranca Airport', 'Verona', 'Italy'),
-                    ('PMI', 'Palma de Mallorca Airport', 'Palma de Mallorca', 'Spain')
-                    ]
-
-    # create an object flights to be inserted to the d_flights table.
-    flights = [(1, 'SI2206', 'GCI', 'JER', '08:30:00', '08:50:00'),
-               (2, 'SI3350', 'JER', 'SOU', '07:15:00', '08:05:00'),
-               (3, 'SI3351', 'SOU', 'JER', '08:35:00', '09:25:00'),
-               (4, 'SI5580', 'JER', 'DUB', '10:35:00', '12:20:00'),
-               (5, 'SI2206', 'JER', 'EXE', '09:20:00', '10:05:00'),
-               (6, 'SI2207', 'EXE', 'JER', '10:45:00', '11:30:00'),
-               (7, 'SI2203', 'EXE', 'JER', '08:35:00', '09:20:00'),
-               (8, 'SI2202', 'JER', 'EXE', '07:20:00', '08:05:00'),
-               (9, 'SI5552', 'GCI', 'JER', '12:45:00', '13:05:00'),
-               (10, 'SI5581', 'DUB', 'JER', '13:00:00', '14:45:00'),
-               (11, 'SI3312', 'GCI', 'SOU', '10:00:00', '10:45:00'),
-               (12, 'SI3328', 'GCI', 'SOU', '13:50:00', '14:35:00'),
-               (13, 'SI3342', 'GCI', 'SOU', '18:20:00', '19:05:00'),
-               (14, 'SI3329', 'SOU', 'GCI', '15:05:00', '15:50:00'),
-               (15, 'SI3313', 'SOU', 'GCI', '11:15:00', '12:00:00')
-               ]
-
-    # create an object schedule to be inserted to the f_schedule table.
-    schedule = [(1, "2025-04-21", None, None, 2, "P0010001", "scheduled"),
-                (2, "2025-04-21", None, None, 3, "P0010001", "scheduled"),
-                (3, "2025-04-21", None, None, 5, "P0010002", "scheduled"),
-                (4, "2025-04-21", None, None, 6, "P0010002", "scheduled"),
-                (5, "2025-04-06", None, None, 7, "P0010002", "landed"),
-                (6, "2025-04-06", None, None, 8, "P0010002", "landed"),
-                (7, "2025-04-07", None, None, 4, "P0010003", "landed"),
-                (8, "2025-04-07", None, None, 10, "P0010003", "landed"),
-                (9, "2025-04-08", None, None, 9, "P0010004", "landed"),
-                (10, "2025-04-09", None, None, 1, None, "cancelled"),
-                (11, "2025-04-29", None, None, 2, None, "scheduled")
-                ]
-
-    # Use of ? protects against SQL injection attack, with the execute method.
-    # replacing ? with the variable values.
-    # Insert pilot data into database.
-    try:
-        cursor.executemany('''INSERT INTO d_pilot (
-        pilot_ID, first_name, last_name, licence_number, licence_expiry, night_flag
-        ) VALUES   (?,?,?,?,?,?)
-        ''', pilots)
-    # In case of data issues, catch integrity error and print a useful message.
-    except sqlite3.IntegrityError as ie:
-        if "UNIQUE constraint failed: d_pilot.pilot_ID" in str(ie):
-            print("There has been a data integrity error (you've already entered a pilot with that pilot_id). "
-                  "See error message -> ", ie)
-        else:
-            print("There has been an integrity error. Data entry failed. See error message -> ", ie)
-
-    # Insert destination data into database.
-    try:
-        cursor.executemany('''INSERT INTO d_destination (
-        destination_code, airport_name, city, country
-        ) VALUES   (?,?,?,?)
-        ''', destinations)
-    # In case of data issues, catch integrity error and print a useful message.
-    except sqlite3.IntegrityError as ie:
-        if "UNIQUE constraint failed: d_destination.destination_code" in str(ie):
-            print("There has been a data integrity error (you've already entered a destination with that "
-                  "destination_code). See error message -> ", ie)
-        else:
-            print("There has been an integrity error. Data entry failed. See error message -> ", ie)
-
-    # Insert flight data into database.
-    try:
-        cursor.executemany('''INSERT INTO d_flight (
-        flight_ID, flight_number, departure_destination_code, 
-        arrival_destination_code, scheduled_departure_time, scheduled_arrival_time
-        ) VALUES   (?,?,?,?,?,?)
-        ''', flights)
-    # In case of data issues, catch integrity error and print a useful message.
-    except sqlite3.IntegrityError as ie:
-        if "UNIQUE constraint failed: d_flight.flight_id" in str(ie):
-            print("There has been a data integrity error (you've already entered a flight with that "
-                  "flight ID). See error message -> ", ie)
-        else:
-            print("There has been an integrity error. Data entry failed. See error message -> ", ie)
+    connection, cursor = open_connection(path)
 
-    # Insert scheduled flight data into database.
+    # Run all four inserts in one transaction, so they are committed (and synced to disk) together. The connection
+    # commits when the with block ends, or rolls back if anything inside it fails. The transaction is begun before the
+    # inserts, as the deferred foreign key checks (see _bulk_insert_all) only last until the end of a transaction.
     try:
-        cursor.executemany('''INSERT INTO f_schedule (
-        schedule_ID, departure_date, actual_departure_time, actual_arrival_time, 
-        flight_ID, pilot_ID, status
-        ) VALUES   (?, ?, ?, ?, ?, ?, ?)
-        ''', schedule)
-    # In case of data issues, catch integrity error and print a useful message.
+        with connection:
+            if not connection.in_transaction:
+                cursor.execute("BEGIN")
+            _bulk_insert_all(cursor)
+    # Deferred foreign key violations are reported at commit, after which the load has been rolled back.
     except sqlite3.IntegrityError as ie:
-        if "UNIQUE constraint failed: f_schedule.schedule_ID" in str(ie):
-            print("There has been a data integrity error (you've already scheduled a flight with that "
-                  "schedule ID). See error message -> ", ie)
-        else:
-            print("There has been an integrity error. Data entry failed. See error message -> ", ie)
-
-    # Commit changes to the database.
-    connection.commit()
-
-    # Close cursor and connection to the database.
-    close_connection(connection, cursor)
+        print("There has been an integrity error (a row refers to a flight, pilot or destination that doesn't "
+              "exist). Data entry failed. See error message -> ", ie)
 
 
 # Ensure the databse is only set up if the file is run directly.
@@ -268,5 +326,9 @@ if __name__ == "__main__":
     # Database Setup in SQLite. Create and populate the database in SQLite with sample data to facilitate testing and
     # demonstration. Drop_all_tables is commented out to avoid accidental or intended deletion.
     # drop_all_tables()  # Delete database tables.
-    create_database_tables()  # Creates the database tables.
-    load_sample_data()  # Populates the database with sample data.
+    # The whole setup uses one connection and one transaction: BEGIN is sent ahead of the table creation script, so the
+    # new tables are committed together with the sample data when load_sample_data() commits.
+    connection, cursor = open_connection()
+    cursor.executescript('BEGIN;' + _DDL_SCRIPT)  # Creates the database tables.
+    load_sample_data()  # Populates the database with sample data and commits.
+    shutdown()  # Optimises and closes the shared database connection.
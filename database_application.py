@@ -7,6 +7,8 @@ from database_queries import fetch_destinations
 from database_queries import modify_schedule
 from database_queries import modify_destination
 from database_queries import assign_pilot
+from database_queries import assign_pilots_bulk
+from database_queries import clear_summary_cache
 # import the sqlite3 package
 import sqlite3
 # import the ability to show users tables in an easy to view table
@@ -37,7 +39,7 @@ def quit_application():
 def welcome_message():
     """ Function is called when the application first runs. Provides a start menu for the user to choose from.
     Calls other functions, based on the integer user input indicating what type of query they wish to complete.
-    Handles a value error exception if anything other than 0-7 is entered and awaits the correct user input.
+    Handles a value error exception if anything other than 0-8 is entered and awaits the correct user input.
     """
     print(""" 
     Welcome! Here are your database options:
@@ -48,16 +50,17 @@ def welcome_message():
         5) Assign a pilot to a flight.
         6) View destination information.
         7) Update destination information.
+        8) Assign pilots to flights in bulk.
         0) Exit.
 
     (Note that if you exit by selecting '0' your unconfirmed changes will not be saved)
     """)
 
-    # Try processing the user input as an integer value between 0-7.
+    # Try processing the user input as an integer value between 0-8.
     try:
         start_menu_choice = int(input('Which process from the above selection menu '
                                       'would you like to choose? (type a menu item '
-                                      'number between 0-7 and press enter): '))
+                                      'number between 0-8 and press enter): '))
 
         if start_menu_choice == 1:
             add_new_flight()
@@ -73,10 +76,12 @@ def welcome_message():
             view_destination_info()
         elif start_menu_choice == 7:
             update_destination_info()
+        elif start_menu_choice == 8:
+            assign_pilots_in_bulk()
         elif start_menu_choice == 0:
             quit_application()
     except ValueError:
-        print("Enter a numeric value between 0 and 7: ")
+        print("Enter a numeric value between 0 and 8: ")
 
 
 def add_new_flight():
@@ -149,8 +154,9 @@ def add_new_flight():
             cursor.execute('''INSERT INTO f_schedule (departure_date, flight_ID, status)
             VALUES   (?, ?, ?)''', (departure_date, flight_id, status,))
 
-            # commit the update to the database and inform the user.
+            # commit the update to the database and inform the user. The cached summaries are now out of date.
             connection.commit()
+            clear_summary_cache()
             print("All changes committed to the database successfully.")
 
         # Execute a query to return the details of the new flight to the user.
@@ -451,7 +457,35 @@ def assign_pilot_to_flight():
     departure_date = input("Enter the departure date e.g. 2025-04-21")
     departure_city = input("Enter the city this flight will depart from e.g. Exeter")
     arrival_city = input("Enter the city this flight will arrive at e.g. Jersey")
-    assign_pilot(pilot_id, flight_number, departure_date, departure_city, arrival_city)
+    assign_pilot(pilot_id, flight_number, departure_date, departure_city, arrival_city, verbose=True)
+
+
+def assign_pilots_in_bulk():
+    """Function to assign pilots to several flights at once. User enters one assignment per line (pilot_id,
+    flight_number, departure_date, departure_city, arrival_city) and a blank line to finish. Calls the
+    assign_pilots_bulk function, which saves all the assignments together in one transaction.
+    """
+    print("Enter one assignment per line as: pilot ID, flight number, departure date, departure city, arrival city "
+          "(e.g. P0010007, SI2207, 2025-04-21, Exeter, Jersey). Enter a blank line to finish.")
+
+    # Collect the assignments until the user enters a blank line.
+    assignments = []
+    while True:
+        assignment_input = input("Enter an assignment or a blank line to finish: ").strip()
+        if not assignment_input:
+            break
+        values = [value.strip() for value in assignment_input.split(",")]
+        # Skip lines that don't have all five values and let the user know.
+        if len(values) != 5:
+            print("Please enter five values separated by commas, this line has been skipped.")
+            continue
+        assignments.append(values)
+
+    # Assign the pilots in one go, unless nothing was entered.
+    if assignments:
+        assign_pilots_bulk(assignments)
+    else:
+        print("No assignments were entered. No changes have been made.")
 
 
 def view_destination_info():
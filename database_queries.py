@@ -2,55 +2,80 @@
 Contains the functions for each SQLite database query.
 Used by run_queries.py to address the task SQL Queries and Database Interaction.
 Used by database_application as the queries for the CLI application used by main.
-Includes functions open_connection, close_connection, fetch_flights, modify_schedule, fetch_pilots, assign_pilot,
-fetch_destinations, modify_destination
+Includes functions open_connection, close_connection, get_conn, transaction, close_pool, iter_flights, fetch_flights,
+fetch_flights_multi, print_flights, modify_schedule, iter_pilots, fetch_pilots, print_pilots, assign_pilot,
+assign_pilots_bulk, fetch_destinations, modify_destination, unassigned_flights, flights_per_pilot,
+flights_per_destination, summary_report, clear_summary_cache
+The functions with a cursor keyword argument run on that cursor when a caller passes one (so a caller that already has
+a connection can run several calls on it) and leave it open, otherwise they use a pooled connection of their own.
 """
 
 # import the sqlite3 package
 import sqlite3
+# import queue for the pool of open connections
+import queue
+# import contextmanager to lend out pooled connections in a with block
+from contextlib import contextmanager
+# import lru_cache to keep the summary results between changes to the database
+from functools import lru_cache
+# import islice to take the first batch of rows for a table
+from itertools import islice
 # import tabulate to format tables
 from tabulate import tabulate
 
+# Set once the persistent database settings (journal mode and filter indexes) have been applied to flight.db.
+_initialized = False
+
+# Headers for the tables printed by the functions below, in the column order of their queries.
+FLIGHT_HEADERS = ("Flight Number", "Departure Destination", "Arrival Destination", "Scheduled Departure",
+                  "Scheduled Arrival", "Departure Date", "Pilot ID", "Flight Status")
+PILOT_HEADERS = ("Schedule ID", "Departure Date", "Flight ID", "Flight Status", "Pilot ID", "First Name", "Last Name",
+                 "Scheduled Departure time", "Scheduled Arrival Time", "Departure City", "Arrival City")
+SCHEDULE_HEADERS = ("Schedule ID", "Departure Date", "Actual Departure Time", "Actual Arrival Time", "Flight ID",
+                    "Pilot ID", "Flight Status")
+DEST_HEADERS = ("Destination Code", "Airport Name", "City", "Country")
+
+# Filters for each fetch function: the function argument and the WHERE fragment it adds when set, in the order they
+# are applied (see build_where).
+FLIGHT_FILTERS = (("flight_number", "df.flight_number = ?"), ("departure_city", "dd1.city = ?"),
+                  ("arrival_city", "dd2.city = ?"), ("departure_date", "fs.departure_date = ?"),
+                  ("flight_status", "fs.status = ?"))
+PILOT_FILTERS = (("pilot_id", "dp.pilot_ID = ?"), ("first_name", "dp.first_name = ?"),
+                 ("last_name", "dp.last_name = ?"))
+DEST_FILTERS = (("destination_code", "destination_code = ?"), ("airport_name", "airport_name = ?"),
+                ("city", "city = ?"), ("country", "country = ?"))
+
+# WHERE clauses already built by build_where, keyed by the filter spec and the set of filters that were given.
+_WHERE_CACHE = {}
+
+# Indexes for the columns the fetch functions below filter on, created the first time a connection is opened. The
+# foreign key indexes and the v_pilot_counts view are part of the schema created by airline_database.py.
+_SCHEMA_SCRIPT = """
+    CREATE INDEX IF NOT EXISTS ix_schedule_date ON f_schedule(departure_date);
+    CREATE INDEX IF NOT EXISTS ix_schedule_status ON f_schedule(status);
+    CREATE INDEX IF NOT EXISTS ix_dest_city ON d_destination(city);
+    CREATE INDEX IF NOT EXISTS ix_flight_number ON d_flight(flight_number);
+    CREATE INDEX IF NOT EXISTS ix_pilot_name ON d_pilot(last_name, first_name);
+    ANALYZE;
+    """
 
-def open_connection():
-    """ Connects to the flight.db database, creating it if it doesn't
-     already exist. Returns a connection and cursor.
-     """
-    # Open a database connection & create flight.db database if non-existent.
-    connection = sqlite3.connect('flight.db')
+# Open connections waiting to be reused, so each query doesn't reopen flight.db and start with a cold page cache.
+_POOL = queue.Queue(maxsize=4)
 
-    # Create a database cursor to query the database.
-    cursor = connection.cursor()
-    return connection, cursor
+# Every row of d_destination, loaded by the first fetch_destinations call and filtered in Python after that. Set back
+# to None once a change to the database is committed (see _after_write), so the next fetch reloads it.
+_dest_cache = None
 
 
-def close_connection(connection, cursor):
-    """ Closes the cursor and connection to the flight.db database"""
-    # close the cursor
-    cursor.close()
-
-    # close the connection to free resources used by the database
-    connection.close()
+# Queries for the fetch functions, built once. The fetch functions append the WHERE clause for the active filters (see
+# build_where), so each filter combination always produces the same SQL text and reuses its cached compiled statement.
 
-
-def fetch_flights(flight_number=None, departure_city=None, arrival_city=None,
-                  departure_date=None, flight_status=None):
-    """ Function to fetch all flights with the option to enter additional
-    criteria in order to filter the data (flight_number, departure_city,
-    arrival_city, departure_date, flight_status). Returns scheduled & unscheduled
-    flights. Protects against SQL injection by using parameterised queries.
-    """
-    # Open connection to the database & create cursor
-    connection, cursor = open_connection()
-
-    # Script to query the database for relevant flight data. WHERE instruction
-    # is inserted once created, using if statements, for flexible querying
-    # Left joins ensure that flights are returned, even when these have not
-    # been scheduled.
-    flight_query = '''
-        SELECT df.flight_number, dd1.airport_name, dd2.airport_name,
-        df.scheduled_departure_time, df.scheduled_arrival_time, 
-        fs.departure_date, dp.pilot_ID, fs.status
+# Script to query the database for relevant flight data, in the column order of FLIGHT_HEADERS. Left joins ensure that
+# flights are returned, even when these have not been scheduled.
+_FLIGHT_COLUMNS = '''df.flight_number, dd1.airport_name, dd2.airport_name,
+        df.scheduled_departure_time, df.scheduled_arrival_time,
+        fs.departure_date, dp.pilot_ID, fs.status'''
+_FLIGHT_TABLES = '''
         FROM d_flight df
         LEFT JOIN f_schedule fs on df.flight_ID = fs.flight_ID
         LEFT JOIN d_destination dd1 on df.departure_destination_code 
@@ -59,61 +84,354 @@ def fetch_flights(flight_number=None, departure_city=None, arrival_city=None,
         = dd2.destination_code
         LEFT JOIN d_pilot dp on fs.pilot_ID = dp.pilot_ID
         '''
+_FLIGHT_QUERY = f'''
+        SELECT {_FLIGHT_COLUMNS}{_FLIGHT_TABLES}'''
+
+# Script to query the database for data that is relevant for pilot schedules. Inner join ensures that flights are
+# returned only if they have a schedule ID and pilot ID.
+_PILOT_QUERY = '''
+    SELECT fs.schedule_ID, fs.departure_date, fs.flight_ID, fs.status, 
+    dp.pilot_ID, dp.first_name, dp.last_name, df.scheduled_departure_time, 
+    df.scheduled_arrival_time, dd1.city, dd2.city  
+    FROM f_schedule fs
+    JOIN d_pilot dp on fs.pilot_ID = dp.pilot_ID
+    JOIN d_flight df on fs.flight_ID = df.flight_ID
+    JOIN d_destination dd1 on df.departure_destination_code = dd1.destination_code
+    JOIN d_destination dd2 on df.arrival_destination_code = dd2.destination_code 
+    '''
 
-    # Create tuple for holding the where elements for flight_query.
-    where_criteria = ()
-    # Create tuple for holding the where fields for the parameterised query.
-    fields = ()
+# Parameterised query to return destination information.
+_DESTINATION_QUERY = '''
+    SELECT destination_code, airport_name, city, country  
+    FROM d_destination
+    '''
 
-    # if criteria is specified in the function call, insert into holder tuples.
-    if flight_number:
-        where_criteria += ("df.flight_number = ?",)
-        fields += (flight_number,)
+# Subquery to look up a flight_id from the flight number and the departure and arrival cities. Parameters:
+# flight_number, departure_city, arrival_city.
+_FLIGHT_ID_LOOKUP = '''(
+        SELECT df.flight_id
+        FROM d_flight df
+        JOIN d_destination dd1 ON df.departure_destination_code = dd1.destination_code
+        JOIN d_destination dd2 ON df.arrival_destination_code = dd2.destination_code
+        WHERE df.flight_number = ?
+        AND dd1.city = ?
+        AND dd2.city = ?
+    )'''
+
+# Parameterised query to assign a pilot to a scheduled flight, only if the pilot exists. The checks and the change are
+# one statement, so nothing can change in between. Parameters: pilot_id, departure_date, flight_number, departure_city,
+# arrival_city, pilot_id.
+_PILOT_ASSIGNMENT = f'''
+    UPDATE f_schedule
+    SET pilot_id = ?
+    WHERE departure_date = ?
+    AND flight_id = {_FLIGHT_ID_LOOKUP}
+    AND EXISTS (SELECT 1 FROM d_pilot WHERE pilot_ID = ?)
+    '''
 
-    if departure_city:
-        where_criteria += ("dd1.city = ?",)
-        fields += (departure_city,)
+# Parameterised query to look up the scheduled flight a pilot was assigned to, through the schedule index. Parameters:
+# departure_date, flight_number, departure_city, arrival_city.
+_ASSIGNED_SCHEDULE_LOOKUP = f'''
+    SELECT schedule_ID, pilot_ID, status
+    FROM f_schedule
+    WHERE departure_date = ?
+    AND flight_id = {_FLIGHT_ID_LOOKUP}
+    '''
 
-    if arrival_city:
-        where_criteria += ("dd2.city = ?",)
-        fields += (arrival_city,)
+# Parameterised query to look up a single scheduled flight by its schedule_ID.
+_SCHEDULE_LOOKUP = '''
+    SELECT schedule_ID, departure_date, actual_departure_time,
+    actual_arrival_time, flight_ID, pilot_ID, status
+    FROM f_schedule
+    WHERE schedule_ID = ?
+    '''
 
-    if departure_date:
-        where_criteria += ("fs.departure_date = ?",)
-        fields += (departure_date,)
+# Parameterised query to update a scheduled flight. COALESCE keeps the current value of any column passed as NULL, so
+# the SQL text is the same whichever columns change and SQLite prepares it once per connection. Parameters:
+# new_departure_time, new_arrival_time, new_status, schedule_id.
+_SCHEDULE_MODIFICATION = '''
+    UPDATE f_schedule
+    SET actual_departure_time = COALESCE(?, actual_departure_time),
+    actual_arrival_time = COALESCE(?, actual_arrival_time),
+    status = COALESCE(?, status)
+    WHERE schedule_ID = ?
+    '''
+
+# Parameterised query to look up a single destination by its destination_code.
+_DESTINATION_LOOKUP = _DESTINATION_QUERY + "WHERE destination_code = ?"
+
+
+def _new_connection():
+    """ Opens a new connection to the flight.db database, creating it if it doesn't already exist, and applies the
+    connection settings.
+    """
+    global _initialized
+
+    # Open a database connection & create flight.db database if non-existent. Autocommit mode (isolation_level=None)
+    # leaves transactions to the explicit BEGIN / commit in the write functions below. Each filter combination of the
+    # fetch queries is its own SQL text, so keep enough compiled statements to cover them all.
+    connection = sqlite3.connect('flight.db', isolation_level=None, check_same_thread=False, cached_statements=256)
+
+    # analysis_limit keeps every ANALYZE on this connection (the one below and the one run by PRAGMA optimize, see
+    # close_connection) to a sample of each index, so it is set first.
+    connection.execute('PRAGMA analysis_limit=1000')
+
+    # WAL lets readers and a writer work at the same time and needs fewer fsyncs per commit. The journal mode and the
+    # indexes are stored in the database file, so they only need setting up the first time. ANALYZE gives the query
+    # planner the statistics to choose between the indexes. If the tables don't exist yet, the next new connection tries
+    # again.
+    if not _initialized:
+        connection.execute('PRAGMA journal_mode=WAL')
+        try:
+            connection.executescript(_SCHEMA_SCRIPT)
+            _initialized = True
+        except sqlite3.OperationalError as oe:
+            print("The indexes could not be created, check that airline_database.py has created the tables. "
+                  "See error message -> ", oe)
+
+    # Per-connection settings: sync at WAL checkpoints only, a 64 MB page cache and temporary tables held in memory.
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('PRAGMA cache_size=-65536')
+    connection.execute('PRAGMA temp_store=MEMORY')
+
+    # Read pages through a memory map rather than copying them into SQLite's page cache, for the join queries below.
+    connection.execute('PRAGMA mmap_size=268435456')
+    return connection
+
+
+def open_connection(read_only=False):
+    """ Connects to the flight.db database, reusing a pooled connection when one is free. Returns a connection and
+    cursor. With read_only=True the connection refuses any change to the database until it is closed.
+    """
+    # Take a connection from the pool, or open a new one if they are all in use.
+    try:
+        connection = _POOL.get_nowait()
+    except queue.Empty:
+        connection = _new_connection()
 
-    if flight_status:
-        where_criteria += ("fs.status = ?",)
-        fields += (flight_status,)
+    # Create a database cursor to query the database.
+    cursor = connection.cursor()
 
-    #  Create the end of flight_query if there are elements in the tuple.
-    if where_criteria:
-        flight_query += " WHERE " + " AND ".join(where_criteria)
+    # Mark connections used only for reading, so a query can't write by mistake.
+    if read_only:
+        cursor.execute('PRAGMA query_only=ON')
+    return connection, cursor
 
-    # Order in reverse date order to have the newest dates at the top of the list.
-    flight_query += "ORDER BY fs.departure_date DESC"
 
-    #  Execute the parameterised query.
-    cursor.execute(flight_query, fields)
-    #  Fetch all query results.
-    result = cursor.fetchall()
+def close_connection(connection, cursor):
+    """ Closes the cursor and returns the connection to the pool, closing it instead if the pool is full."""
+    # close the cursor, so no unfinished query keeps a read snapshot of the database open
+    cursor.close()
 
-    #  Prepare headers for the tabulate function.
-    flight_headers = ["Flight Number", "Departure Destination", "Arrival Destination", "Scheduled Departure",
-                      "Scheduled Arrival", "Departure Date", "Pilot ID", "Flight Status"]
+    # Don't hand on a transaction that was left open (e.g. a function returned early after BEGIN).
+    if connection.in_transaction:
+        connection.rollback()
 
-    #  Print the result in a neat table, unless empty. If empty, return a helpful message.
-    if result:
-        print(tabulate(result, headers=flight_headers, tablefmt="rounded_outline"))
+    # Allow writes again (the connection may have been opened read only), then refresh the query planner statistics for
+    # any table that has changed enough to need it.
+    connection.execute('PRAGMA query_only=OFF')
+    connection.execute('PRAGMA optimize')
+
+    # Keep the connection for the next query, or close it to free resources if enough are already pooled.
+    try:
+        _POOL.put_nowait(connection)
+    except queue.Full:
+        connection.close()
+
+
+@contextmanager
+def get_conn(read_only=False):
+    """ Context manager for a pooled connection to the flight.db database. Yields a connection and cursor and returns
+    the connection to the pool when the block ends, even if it raised. Lets a script run many queries on one connection.
+    """
+    connection, cursor = open_connection(read_only)
+    try:
+        yield connection, cursor
+    finally:
+        close_connection(connection, cursor)
+
+
+@contextmanager
+def transaction(cursor):
+    """ Context manager that runs a block of writes on the cursor's connection as one transaction, so they are synced
+    to disk once instead of once per statement. Commits when the block ends, then discards the cached summaries and
+    destinations, or rolls back if it raised. If a transaction is already open, the block simply joins it.
+    """
+    if cursor.connection.in_transaction:
+        yield cursor
+        return
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        yield cursor
+    except BaseException:
+        cursor.connection.rollback()
+        raise
+    cursor.connection.commit()
+    _clear_caches()
+
+
+def _clear_caches():
+    """ Discards the cached summaries and destinations, so the next read of either goes to the database."""
+    global _dest_cache
+    _dest_cache = None
+    clear_summary_cache()
+
+
+def _after_write(cursor):
+    """ Called by modify_schedule once it has changed the database. Discards the cached summaries and
+    destinations if the change is already committed. If it is part of a transaction the caller still has open,
+    transaction() discards them after the commit instead, so a read in between (on another connection) can't cache the
+    data from before the commit. Callers grouping it with other writes in a transaction of their own should use
+    transaction() for it.
+    """
+    if not cursor.connection.in_transaction:
+        _clear_caches()
+
+
+@contextmanager
+def _use_cursor(cursor=None, read_only=False):
+    """ Yields the cursor a caller passed in, or else a cursor on a pooled connection (see get_conn), which goes back to
+    the pool when the block ends, even if it raised."""
+    if cursor is not None:
+        yield cursor
     else:
-        print("No data returned.")
+        with get_conn(read_only) as (_, cursor):
+            yield cursor
+
+
+def close_pool():
+    """ Closes every pooled connection to the flight.db database. Used when the application exits."""
+    while True:
+        try:
+            _POOL.get_nowait().close()
+        except queue.Empty:
+            break
+
 
-    #  Close the connection to the database and the cursor.
-    close_connection(connection, cursor)
+def _print_table(rows, headers, empty_message, batch_size=1000):
+    """ Prints rows (an executed cursor, a generator such as iter_flights, or a list) in a neat table. Column widths and
+    alignment are set by the first batch_size rows, then the remaining rows are printed a batch at a time as they
+    arrive, so the first rows are shown before the last are fetched and at most two batches are held in memory. Prints
+    empty_message instead if there are no rows. Each later batch is formatted by tabulate together with the first
+    batch, so its rows line up with the ones already printed, unless a later cell is wider than its column or changes
+    the column's type, in which case that batch's columns are widened or realigned.
+    """
+    # Take the first batch, if there are no rows provide the helpful message instead.
+    rows = iter(rows)
+    first = list(islice(rows, batch_size))
+    if not first:
+        print(empty_message)
+        return
+
+    # Format the first batch with tabulate and print it without the bottom border, which is printed at the end.
+    table = tabulate(first, headers=headers, tablefmt="rounded_outline").split("\n")
+    print("\n".join(table[:-1]))
+
+    # Format each later batch after the first one and print only its own lines, which follow those of the first batch.
+    for batch in iter(lambda: list(islice(rows, batch_size)), []):
+        lines = tabulate(first + batch, headers=headers, tablefmt="rounded_outline").split("\n")
+        print("\n".join(lines[len(table) - 1:-1]))
+
+    # Close the table.
+    print(table[-1])
+
+
+def build_where(spec, values):
+    """ Builds a WHERE clause from a filter spec (e.g. FLIGHT_FILTERS) and the values of its arguments (e.g. the calling
+    function's locals()). Only the filters with a value are included, in the order of the spec, so each combination
+    always produces the same SQL text. Returns the clause (empty if no filter is set) and the list of parameters.
+    Each clause is built once per combination of filters and then reused from _WHERE_CACHE.
+    """
+    active = frozenset(name for name, _ in spec if values[name])
+    clause = _WHERE_CACHE.get((spec, active))
+    if clause is None:
+        fragments = [fragment for name, fragment in spec if name in active]
+        clause = _WHERE_CACHE.setdefault((spec, active), "WHERE " + " AND ".join(fragments) if fragments else "")
+    return clause, [values[name] for name, _ in spec if name in active]
+
+
+def _print_kv_row(headers, row):
+    """ Prints a single row as one line per column, with the headers aligned on the left. Used for the before and after
+    displays of the modify functions, where a full table isn't needed.
+    """
+    width = max(map(len, headers))
+    for header, value in zip(headers, row):
+        print(f"  {header:<{width}} : {'' if value is None else value}".rstrip())
+
+
+def iter_flights(flight_number=None, departure_city=None, arrival_city=None,
+                 departure_date=None, flight_status=None, *, chunk_size=1000, cursor=None):
+    """ Generator that yields the flights matching the same filters as fetch_flights, one row at a time. Rows are
+    fetched from SQLite chunk_size at a time, so only one chunk is held in memory however many flights there are.
+    """
+    # Build the WHERE clause and its parameters from the filters specified in the function call.
+    where_clause, fields = build_where(FLIGHT_FILTERS, locals())
+
+    # Assemble flight_query, with each clause on its own line. Order in reverse date order to have the newest dates at
+    # the top of the list.
+    flight_query = f"{_FLIGHT_QUERY}\n{where_clause}\nORDER BY fs.departure_date DESC"
+
+    #  Execute the parameterised query and yield the rows one chunk at a time.
+    with _use_cursor(cursor, read_only=True) as cursor:
+        cursor.execute(flight_query, fields)
+        while rows := cursor.fetchmany(chunk_size):
+            yield from rows
+
+
+def fetch_flights(flight_number=None, departure_city=None, arrival_city=None,
+                  departure_date=None, flight_status=None, *, cursor=None):
+    """ Function to fetch all flights with the option to enter additional
+    criteria in order to filter the data (flight_number, departure_city,
+    arrival_city, departure_date, flight_status). Returns scheduled & unscheduled
+    flights. Protects against SQL injection by using parameterised queries.
+    """
+    #  Print the flights in a neat table as they are fetched, unless empty. If empty, return a helpful message.
+    print_flights(iter_flights(flight_number, departure_city, arrival_city, departure_date, flight_status,
+                               cursor=cursor))
+
+
+def fetch_flights_multi(searches, *, cursor=None):
+    """ Function to run several flight searches in one query. Each search is a dict of fetch_flights filters (e.g.
+    {"departure_city": "Jersey"}, or {} for all flights). The searches are combined with UNION ALL, so SQLite runs them
+    as one statement. Returns a list of rows, each starting with the index of the search it matched (rows from one
+    search are together, in reverse date order), then the schedule_ID and flight_ID that identify the row (schedule_ID
+    is None for a flight that has no schedule), followed by the columns of fetch_flights. Raises TypeError for a
+    filter fetch_flights doesn't have, as fetch_flights would.
+    """
+    # With no searches there is nothing to query.
+    if not searches:
+        return []
+
+    # Build one SELECT per search, tagged with the search's index, and join them with UNION ALL.
+    selects = []
+    fields = []
+    for index, search in enumerate(searches):
+        unknown = set(search) - {name for name, _ in FLIGHT_FILTERS}
+        if unknown:
+            raise TypeError(f"fetch_flights_multi() got unknown filter(s): {', '.join(sorted(unknown))}")
+        search_values = {name: search.get(name) for name, _ in FLIGHT_FILTERS}
+        where_clause, search_fields = build_where(FLIGHT_FILTERS, search_values)
+        selects.append(f"SELECT {index} AS source, fs.schedule_ID, df.flight_ID, {_FLIGHT_COLUMNS}{_FLIGHT_TABLES}\n"
+                       f"{where_clause}")
+        fields.extend(search_fields)
+
+    # Order by search, then in reverse date order within each search (departure date is the ninth column).
+    flight_query = "\nUNION ALL\n".join(selects) + "\nORDER BY 1, 9 DESC"
+
+    #  Execute the parameterised query and fetch all the rows.
+    with _use_cursor(cursor, read_only=True) as cursor:
+        cursor.execute(flight_query, fields)
+        return cursor.fetchall()
+
+
+def print_flights(rows):
+    """ Prints flight rows (a list, or a generator such as iter_flights) in the same table as fetch_flights, or a
+    helpful message if there are none."""
+    _print_table(rows or (), FLIGHT_HEADERS, "No data returned.")
 
 
 def modify_schedule(schedule_id=None, new_departure_time=None,
-                    new_arrival_time=None, new_status=None):
+                    new_arrival_time=None, new_status=None, *, cursor=None):
     """ Function to update flight schedules. User enters the schedule_ID for
     the relevant scheduled flight alongside one of three chosen options: 
     new_departure_time, new_arrival_time, new_status. Protects against SQL 
@@ -127,413 +445,358 @@ def modify_schedule(schedule_id=None, new_departure_time=None,
     # Provide feedback to the user, showing which schedule_ID was queried.
     print("Before making changes, the existing database information for ScheduleID", schedule_id, "was:")
 
-    #  Open connection to the database and create cursor
-    connection, cursor = open_connection()
+    #  Use the caller's cursor, or open a connection to the database and create a cursor.
+    with _use_cursor(cursor) as cursor:
+        #  Execute the parameterised query, schedule_id is a primary key and will only return one result (if exists).
+        cursor.execute(_SCHEDULE_LOOKUP, (schedule_id,))
+        #  Fetch the query result.
+        schedule_result = cursor.fetchone()
 
-    #  Create the parameterised query, to return the previous scheduled flight information to the user.
-    schedule_lookup = '''
-    SELECT schedule_ID, departure_date, actual_departure_time, 
-    actual_arrival_time, flight_ID, pilot_ID, status
-    FROM f_schedule
-    WHERE schedule_ID = ?
-    '''
+        #  Print the result if the schedule id exists.
+        if schedule_result:
+            _print_kv_row(SCHEDULE_HEADERS, schedule_result)
+        else:
+            print("Schedule ID", schedule_id, "doesn't exist. Cancelled transaction. No changes have been made.")
+            return
 
-    #  Execute the parameterised query, schedule_id is a primary key and will only return one result (if exists).
-    cursor.execute(schedule_lookup, (schedule_id,))
-    #  Fetch the query result.
-    schedule_result = cursor.fetchone()
-
-    #  Prepare headers for the tabulate function.
-    schedule_headers = ["Schedule ID", "Departure Date", "Actual Departure Time", "Actual Arrival Time",
-                        "Flight ID", "Pilot ID", "Flight Status"]
-    #  Print the result if the schedule id exists.
-    if schedule_result:
-        print(tabulate([schedule_result], headers=schedule_headers, tablefmt="rounded_outline"))
-    else:
-        print("Schedule ID", schedule_id, "doesn't exist. Cancelled transaction. No changes have been made.")
-        return
+        #  Feedback to user that the schedule information is being adapted.
+        print("Updating schedule information for schedule ID", schedule_id, "...")
 
-    #  Feedback to user that the schedule information is being adapted.
-    print("Updating schedule information for schedule ID", schedule_id, "...")
+        # Apply all the changes in one UPDATE (an empty value counts as not provided). A single statement is atomic, so
+        # no explicit transaction is needed; a caller can still group several calls in one with transaction().
+        cursor.execute(_SCHEDULE_MODIFICATION,
+                       (new_departure_time or None, new_arrival_time or None, new_status or None, schedule_id))
+        _after_write(cursor)
 
-    #  To comply with ACID - the entire transaction will complete or nothing. Begin transaction.
-    cursor.execute("BEGIN")
+        #  Prepare to feed back to the user the new schedule information for that schedule ID.
+        print("After any changes, the schedule information, for schedule ID", schedule_id, "is:")
 
-    # the function only took one parameter, therefore, the script is carried out depending on which was entered
-    # (departure time, arrival time, flight status).
-    if new_departure_time:
-        schedule_modification = ''' 
-        UPDATE f_schedule 
-        SET actual_departure_time = ? 
-        WHERE schedule_ID = ?
-        '''
-        #  Execute the query.
-        cursor.execute(schedule_modification, (new_departure_time, schedule_id))
-
-    if new_arrival_time:
-        schedule_modification = ''' 
-        UPDATE f_schedule 
-        SET actual_arrival_time = ? 
-        WHERE schedule_ID = ?
-        '''
-
-        cursor.execute(schedule_modification, (new_arrival_time, schedule_id))
-
-    if new_status:
-        schedule_modification = '''
-        UPDATE f_schedule
-        SET status = ?
-        WHERE schedule_ID = ?
-        '''
+        #  Execute the query that was first provided, this will return the current, updated state for that schedule ID.
+        cursor.execute(_SCHEDULE_LOOKUP, (schedule_id,))
 
-        cursor.execute(schedule_modification, (new_status, schedule_id))
-
-    #  Complete the transaction, commit the changes.
-    connection.commit()
-
-    #  Prepare to feed back to the user the new schedule information for that schedule ID.
-    print("After any changes, the schedule information, for schedule ID", schedule_id, "is:")
-
-    #  Execute the query that was first provided, this will return the current, updated state for that schedule ID.
-    cursor.execute(schedule_lookup, (schedule_id,))
-
-    #  Fetch the result, it will only be one as schedule ID is the primary key.
-    updated_result = cursor.fetchone()
+        #  Fetch the result, it will only be one as schedule ID is the primary key.
+        updated_result = cursor.fetchone()
 
     #  Ensuring there is something to print, prepare headers for a nicely formatted table.
     if updated_result:
-        print(tabulate([updated_result], headers=schedule_headers, tablefmt="rounded_outline"))
+        _print_kv_row(SCHEDULE_HEADERS, updated_result)
     # This line shouldn't ever run, but let the user know if there was no data.
     else:
         print("\nNo data returned. You need to check the database as it doesn't appear to exist.")
 
-    # Close the database connection and cursor.
-    close_connection(connection, cursor)
 
+def iter_pilots(pilot_id=None, first_name=None, last_name=None, *, chunk_size=1000, cursor=None):
+    """ Generator that yields the pilot schedules matching the same filters as fetch_pilots, one row at a time, fetched
+    from SQLite chunk_size at a time.
+    """
+    # Build the WHERE clause and its parameters from the filters specified in the function call. Returns schedules for
+    # all pilots if no pilot details were selected.
+    where_clause, fields = build_where(PILOT_FILTERS, locals())
+
+    # Assemble pilot_query from the pilot schedule query and the WHERE clause.
+    pilot_query = f"{_PILOT_QUERY}\n{where_clause}"
 
-def fetch_pilots(pilot_id=None, first_name=None, last_name=None):
+    #  Execute the query and yield the rows one chunk at a time.
+    with _use_cursor(cursor, read_only=True) as cursor:
+        cursor.execute(pilot_query, fields)
+        while rows := cursor.fetchmany(chunk_size):
+            yield from rows
+
+
+def fetch_pilots(pilot_id=None, first_name=None, last_name=None, *, cursor=None):
     """ Function to fetch all pilots, with the option to enter additional
     criteria in order to filter the data (pilot_id, first_name, last_name). Returns scheduled flights for pilots.
     . Protects against SQL injection by using parameterised queries.
     """
-    # Open connection to the database & create cursor
-    connection, cursor = open_connection()
+    # If there is a result, print it in the table as it is fetched. Else provide a helpful message to the user.
+    print_pilots(iter_pilots(pilot_id, first_name, last_name, cursor=cursor))
 
-    # Script to query the database for data that is relevant for pilot schedules. WHERE instruction
-    # is inserted once created, using if statements, for flexible querying.
-    # Inner join ensures that flights are returned only if they have a schedule ID and pilot ID
-    pilot_query = '''
-    SELECT fs.schedule_ID, fs.departure_date, fs.flight_ID, fs.status, 
-    dp.pilot_ID, dp.first_name, dp.last_name, df.scheduled_departure_time, 
-    df.scheduled_arrival_time, dd1.city, dd2.city  
-    FROM f_schedule fs
-    JOIN d_pilot dp on fs.pilot_ID = dp.pilot_ID
-    JOIN d_flight df on fs.flight_ID = df.flight_ID
-    JOIN d_destination dd1 on df.departure_destination_code = dd1.destination_code
-    JOIN d_destination dd2 on df.arrival_destination_code = dd2.destination_code 
-    '''
 
-    #  Tuple to hold the values for the WHERE clause in pilot_query.
-    where_criteria = ()
-    #  Tuple to hold values for the parametrised query.
-    fields = ()
-
-    # Function will return schedules for all pilots or if specific pilot details were selected, the where_criteria
-    # tuple will hold this to allow the user to filter for specific search criteria.
-    if pilot_id:
-        where_criteria += ("dp.pilot_ID = ?",)
-        #  Add value to holder for the parametrised query.
-        fields += (pilot_id,)
-
-    if first_name:
-        where_criteria += ("dp.first_name = ?",)
-        fields += (first_name,)
-
-    if last_name:
-        where_criteria += ("dp.last_name = ?",)
-        fields += (last_name,)
-
-    #  Form the WHERE clause if parameters are included in the function call.
-    if where_criteria:
-        pilot_query += " WHERE " + " AND ".join(where_criteria)
-
-    #  Execute the query.
-    cursor.execute(pilot_query, fields)
-    # Fetch all the query result(s).
-    result = cursor.fetchall()
-
-    # Prepare the headers for the neatly formatted table to return the query results.
-    pilot_headers = ["Schedule ID", "Departure Date", "Flight ID", "Flight Status", "Pilot ID", "First Name",
-                     "Last Name", "Scheduled Departure time", "Scheduled Arrival Time", "Departure City",
-                     "Arrival City"]
-
-    # If there is a result, print it in the table. Else provide a helpful message to the user.
-    if result:
-        print(tabulate(result, headers=pilot_headers, tablefmt="rounded_outline"))
-    else:
-        print("No data returned. Check the data you are using the search by and try again.")
-
-    # Close the database connection and the cursor.
-    close_connection(connection, cursor)
+def print_pilots(rows):
+    """ Prints pilot schedule rows (a list, or a generator such as iter_pilots) in the same table as fetch_pilots, or a
+    helpful message if there are none."""
+    _print_table(rows or (), PILOT_HEADERS,
+                 "No data returned. Check the data you are using the search by and try again.")
 
 
 def assign_pilot(pilot_id=None, flight_number=None, departure_date=None,
-                 departure_city=None, arrival_city=None):
+                 departure_city=None, arrival_city=None, verbose=False, *, cursor=None):
     """ Assign pilot to a flight. User must provide the pilot_id, flight_number,
     departure_date, departure_city and arrival_city to complete the modification.
-    To ensure that the correct flight is modified the flight_id is selected
-    from the database and the user is asked to confirm the change."""
-
-    # Create a database cursor to query the database.
-    connection, cursor = open_connection()
+    The flight_id is looked up within the update itself and the user is asked to confirm the change. With verbose=True
+    the pilot schedule and flight are displayed before the confirmation and the updated schedule row after the
+    change. If the caller has a transaction open, the change becomes part of it and is left for the caller to commit.
+    """
 
     #  If no pilot id was provided, stop with a useful message for the user.
     if pilot_id is None:
         print("No pilot ID has been entered")
-        close_connection(connection, cursor)
-        return
-
-    #  Prepare
-    print("Fetching the schedule information from the database for pilotID: ", pilot_id)
-
-    # Call the fetch_pilot function, using the pilot_id, to allow a user to double check before assigning a pilot.
-    fetch_pilots(pilot_id)
-
-    # Check the user has provided all necessary information, to be able to look up the one specific flight. If not,
-    # stop and provide a useful message to the user.
-    if not all([flight_number, departure_date, departure_city, arrival_city]):
-        print(
-            "In order to assign a pilot, please provide flight number, departure date, departure city and arrival city")
         return
 
-    # Provide the user with the flight information, to allow them to double check before assigning a pilot to it.
-    print("Retrieving the database information for flight number: ", flight_number, " departing on ", departure_date,
-          " from ", departure_city, " to ", arrival_city, ":")
-
-    #  Use the fetch_flights function to return the flight information, using the information provided by the user.
-    fetch_flights(flight_number=flight_number, departure_date=departure_date, departure_city=departure_city,
-                  arrival_city=arrival_city)
-
-    #  Create a boolean to check if the user has confirmed the pilot assignment should go ahead before the change.
-    needs_to_confirm = True
-    while needs_to_confirm:
+    # Use the caller's cursor, or create a database connection and cursor, for every query below.
+    with _use_cursor(cursor) as cursor:
+        if verbose:
+            #  Prepare
+            print("Fetching the schedule information from the database for pilotID: ", pilot_id)
+
+            # Call the fetch_pilot function, using the pilot_id, to allow a user to double check before assigning a
+            # pilot.
+            fetch_pilots(pilot_id, cursor=cursor)
+
+        # Check the user has provided all necessary information, to be able to look up the one specific flight. If
+        # not, stop and provide a useful message to the user.
+        if not all([flight_number, departure_date, departure_city, arrival_city]):
+            print("In order to assign a pilot, please provide flight number, departure date, departure city and "
+                  "arrival city")
+            return
+
+        if verbose:
+            # Provide the user with the flight information, to allow them to double check before assigning a pilot to
+            # it.
+            print("Retrieving the database information for flight number: ", flight_number, " departing on ",
+                  departure_date, " from ", departure_city, " to ", arrival_city, ":")
+
+            #  Use the fetch_flights function to return the flight information, using the information provided by the
+            #  user.
+            fetch_flights(flight_number=flight_number, departure_date=departure_date, departure_city=departure_city,
+                          arrival_city=arrival_city, cursor=cursor)
+
+        #  Ask the user to confirm the pilot assignment should go ahead before the change.
         confirmation_decision = input(
             f"Shall I assign the pilot {pilot_id} to the scheduled flight {flight_number}?  (enter 'yes' to complete "
-            f"the change or 'no' to cancel): ").lower()
+            f"the change or 'no' to cancel): ").strip().lower()
 
-        #  Stop and provide a useful message to the user if they have chosen not to make the changes.
-        if confirmation_decision == "no":
+        #  Stop and provide a useful message to the user unless they have confirmed the change.
+        if confirmation_decision != "yes":
             print("No changes have been made")
-            break
-        #  If the user has confirmed the change is to go ahead then continue.
-        elif confirmation_decision == "yes":
-            needs_to_confirm = False
-
-            # Create a database cursor to query the database.
-            connection, cursor = open_connection()
-
-            #  Prepare a script to look up the flight_id in the database.
-            flight_id_lookup = '''
-            SELECT df.flight_id
-            FROM d_flight df
-            LEFT JOIN d_destination dd1 ON df.departure_destination_code = dd1.destination_code
-            LEFT JOIN d_destination dd2 ON df.arrival_destination_code = dd2.destination_code
-            WHERE df.flight_number = ?
-            AND dd1.city = ?
-            AND dd2.city = ?
-            '''
-
-            # Execute the parameterised query to look up flight ID.
-            cursor.execute(flight_id_lookup, (flight_number, departure_city, arrival_city))
-            # Fetch one (flight ID is the primary key)
-            flight_id = cursor.fetchone()
-
-            # If no flight id has returned then stop and return a useful message to the user.
-            if not flight_id:
-                print(
-                    "The flight details do not appear to exist, based on the criteria provided, check your inputs and "
-                    "try again.")
-                return
-
-            # Save the flight id in a variable
-            flight_id = flight_id[0]
-
-            # Begin a transaction, complying with ACID - all or nothing transactions.
-            cursor.execute("BEGIN")
-
-            # Prepare the parameterised query to update the database.
-            pilot_assignment = '''
-            UPDATE f_schedule
-            SET pilot_id = ?
-            WHERE flight_id = ? 
-            AND departure_date = ?
-            '''
-
-            # Execute the query, using the pilot_assignment script and the user details (plus the looked up flight_ID).
-            cursor.execute(pilot_assignment, (pilot_id, flight_id, departure_date))
-
-            # Commit the changes to the database.
-            connection.commit()
-
-            # Print a message to let the user know the pilot assignment was completed.
-            print("pilot ", pilot_id, " has been assigned successfully.")
-
-        #  Advise the user the pilot schedule, for the current state of the database is being looked up.
-        print("Retrieving pilot schedule details for pilot", pilot_id, ":")
-        # Call the fetch_pilot function to fetch the schedule for the specific pilot ID.
-        fetch_pilots(pilot_id)
-
-        # Advise the user that specific flight detail, for the current state of the database is being looked up.
-        print("Retriv flight schedule details for flight_number", flight_number)
-        # Call the fetch_fligths function to fetch the flight data for the specific flight the user had entered.
-        fetch_flights(flight_number=flight_number, departure_city=departure_city, arrival_city=arrival_city,
-                      departure_date=departure_date)
-
-        # Close the database connection and cursor.
-        close_connection(connection, cursor)
-
-
-def fetch_destinations(destination_code=None, airport_name=None, city=None, country=None):
-    """ Function to return information about all destinations. User can include a parameter for filtering:
-    (destination_code, airport_name, city, country).
+            return
+
+        # Execute the query, using the pilot assignment script and the user details, in a transaction (complying with
+        # ACID - all or nothing transactions) that is committed, or rolled back if it fails, unless the caller already
+        # has one open.
+        with transaction(cursor):
+            cursor.execute(_PILOT_ASSIGNMENT,
+                           (pilot_id, departure_date, flight_number, departure_city, arrival_city, pilot_id))
+            assigned = cursor.rowcount
+
+        # If no row was updated then the pilot or the flight doesn't exist, stop and return a useful message.
+        if assigned == 0:
+            print(
+                "The pilot or flight details do not appear to exist, based on the criteria provided, check your inputs "
+                "and try again.")
+            return
+
+        # Print a message to let the user know the pilot assignment was completed.
+        print("pilot ", pilot_id, " has been assigned successfully.")
+
+        if verbose:
+            # Advise the user that the scheduled flight, for the current state of the database is being looked up.
+            print("Retrieving the updated schedule details for flight number", flight_number, "on", departure_date, ":")
+            # Look up only the changed row of f_schedule, the user has already seen the pilot schedule and the flight.
+            cursor.execute(_ASSIGNED_SCHEDULE_LOOKUP, (departure_date, flight_number, departure_city, arrival_city))
+            for schedule_result in cursor:
+                _print_kv_row(("Schedule ID", "Pilot ID", "Flight Status"), schedule_result)
+
+
+def assign_pilots_bulk(assignments):
+    """ Assign pilots to several flights in one transaction, without asking for confirmation. Each assignment is a
+    (pilot_id, flight_number, departure_date, departure_city, arrival_city) sequence, as for assign_pilot. Returns the
+    number of scheduled flights that were updated.
     """
-    #  Advise the user information is being retrieved.
-    print("Retrieve information about destinations.")
+    # Reorder each assignment into the parameter order of the update query.
+    parameters = [(pilot_id, departure_date, flight_number, departure_city, arrival_city, pilot_id)
+                  for pilot_id, flight_number, departure_date, departure_city, arrival_city in assignments]
 
-    # Create a database cursor to query the database.
+    # Create a connection to the database and cursor.
     connection, cursor = open_connection()
 
-    # Prepare the parameterised query to return destination information.
-    destination_query = '''
-    SELECT destination_code, airport_name, city, country  
-    FROM d_destination
-    '''
-
-    # Hold the users inputted values within a tuple, to use in the WHERE claus.
-    where_criteria = ()
-    # Hold the values in a tuple for the parameterised query.
-    fields = ()
+    # Run every assignment in one transaction (complying with ACID principle - all or nothing to be committed to the
+    # database), so the batch is written and synced once.
+    try:
+        # Execute the same prepared update for each assignment.
+        with transaction(cursor):
+            cursor.executemany(_PILOT_ASSIGNMENT, parameters)
+            assigned = cursor.rowcount
 
-    # If input values were included in the function call, these are added to the where_criteria and fields variables.
-    if destination_code:
-        where_criteria += ("destination_code = ?",)
-        fields += (destination_code,)
+    # If there is an error, the whole batch has been rolled back, provide a useful message for the user.
+    except sqlite3.Error as error:
+        print("There has been an error, no pilots have been assigned. See error message -> ", error)
+        assigned = 0
 
-    if airport_name:
-        where_criteria += ("airport_name = ?",)
-        fields += (airport_name,)
+    # Close the database connection and the cursor.
+    finally:
+        close_connection(connection, cursor)
 
-    if city:
-        where_criteria += ("city = ?",)
-        fields += (city,)
+    # Let the user know how many of the assignments matched a scheduled flight.
+    print(assigned, "of", len(parameters), "scheduled flights have been assigned a pilot.")
+    return assigned
 
-    if country:
-        where_criteria += ("country = ?",)
-        fields += (country,)
 
-    # Process the input values, placing them in a string to add to the destination_query (if they were provided).
-    if where_criteria:
-        destination_query += " WHERE " + " AND ".join(where_criteria)
+def fetch_destinations(destination_code=None, airport_name=None, city=None, country=None, *, cursor=None):
+    """ Function to return information about all destinations. User can include a parameter for filtering:
+    (destination_code, airport_name, city, country). The destinations table is small, so it is read once and kept in
+    _dest_cache, and later calls filter the cached rows instead of querying the database again.
+    """
+    global _dest_cache
 
-    # Execute the query.
-    cursor.execute(destination_query, fields)
-    # Fetch all query results.
-    result = cursor.fetchall()
+    #  Advise the user information is being retrieved.
+    print("Retrieve information about destinations.")
 
-    # Prepare headers to prepare a neat table for printing the results.
-    destination_headers = ["Destination Code", "Airport Name", "City", "Country"]
+    # Read every destination unless they are already cached. Inside a transaction the rows may include uncommitted
+    # changes, so they are read fresh and not cached.
+    rows = _dest_cache
+    if rows is None or (cursor is not None and cursor.connection.in_transaction):
+        # Execute the query on the caller's cursor or a pooled connection, and fetch all the destinations.
+        with _use_cursor(cursor, read_only=True) as reader:
+            reader.execute(_DESTINATION_QUERY)
+            rows = reader.fetchall()
+            if not reader.connection.in_transaction:
+                _dest_cache = rows
+
+    # Keep the destinations that match every filter specified in the function call (the columns of DEST_FILTERS are
+    # in the column order of the destination query).
+    values = locals()
+    filters = [(index, values[name]) for index, (name, _) in enumerate(DEST_FILTERS) if values[name]]
+    result = [row for row in rows if all(row[index] == value for index, value in filters)]
 
     #  Print the results in a formatted table.
-    print(tabulate(result, headers=destination_headers, tablefmt="rounded_outline"))
+    print(tabulate(result, headers=DEST_HEADERS, tablefmt="rounded_outline"))
 
-    # Close the connection and the cursor.
-    close_connection(connection, cursor)
 
-
-def modify_destination(destination_code=None, airport_name=None, city=None, country=None):
+def modify_destination(destination_code=None, airport_name=None, city=None, country=None, *, cursor=None):
     """ Function to allow user to edit the destination details. User provides the destination_code (primary key) for
     the destination that needs modifying as well as one value that needs updating (airport_name, city, country).
+    If the caller has a transaction open, the changes become part of it and are left for the caller to commit.
     """
     # If destination code has not been provided, stop and return a useful message to the user.
     if destination_code is None:
         print("No destination code has been entered")
         return
 
-    # Create a connection to the database and cursor.
-    connection, cursor = open_connection()
-
-    # Change the destination_code to uppercase, as per the database format.
-    destination_code = destination_code.upper()
-
-    # Inform the user the database information is being retrieved.
-    print("Retrieving the database information for Destination Code ", destination_code)
-    #  Call the fetch_destination function with the destination_code to provide the current state to the user.
-    fetch_destinations(destination_code=destination_code)
-
-    # Advise the user that the information is being updated for that destination_code.
-    print("Updating destination information for Destination Code ", destination_code)
-
-    # Try to start a transaction (complying with ACID principle - all or nothing to be committed to the database).
-    try:
-        cursor.execute("BEGIN")
-
-        # If the airport name was provided in the function call then prepare a parameterised query to update this in
-        # the database. If city or country were provided then use the relevant attribute in the SET clause.
-        if airport_name:
-            cursor.execute('''
-            UPDATE d_destination
-            SET airport_name = ?
-            WHERE destination_code = ?
-            ''', (airport_name, destination_code))
-
-        if city:
-            cursor.execute('''
-            UPDATE d_destination
-            SET city = ?
-            WHERE destination_code = ?
-            ''', (city, destination_code))
-
-        if country:
-            cursor.execute('''
-            UPDATE d_destination
-            SET country = ?
-            WHERE destination_code = ?
-            ''', (country, destination_code))
-
-        # Commit the change to the database.
+    # Use the caller's cursor, or create a connection to the database and cursor.
+    with _use_cursor(cursor) as cursor:
+        # Change the destination_code to uppercase, as per the database format.
+        destination_code = destination_code.upper()
+
+        # Inform the user the database information is being retrieved.
+        print("Retrieving the database information for Destination Code ", destination_code)
+        #  Look up the destination_code (primary key, so one row at most) to provide the current state to the user.
+        cursor.execute(_DESTINATION_LOOKUP, (destination_code,))
+        destination_result = cursor.fetchone()
+
+        # Stop and let the user know if the destination code doesn't exist.
+        if destination_result is None:
+            print("Destination Code", destination_code, "doesn't exist. No changes have been made.")
+            return
+        _print_kv_row(DEST_HEADERS, destination_result)
+
+        # Advise the user that the information is being updated for that destination_code.
+        print("Updating destination information for Destination Code ", destination_code)
+
+        # Make the changes in a transaction (complying with ACID principle - all or nothing to be committed to the
+        # database) that is committed, or rolled back if it fails, unless the caller already has one open.
+        try:
+            with transaction(cursor):
+                # If the airport name was provided in the function call then prepare a parameterised query to update
+                # this in the database. If city or country were provided then use the relevant attribute in the SET
+                # clause.
+                if airport_name:
+                    cursor.execute('''
+                    UPDATE d_destination
+                    SET airport_name = ?
+                    WHERE destination_code = ?
+                    ''', (airport_name, destination_code))
+
+                if city:
+                    cursor.execute('''
+                    UPDATE d_destination
+                    SET city = ?
+                    WHERE destination_code = ?
+                    ''', (city, destination_code))
+
+                if country:
+                    cursor.execute('''
+                    UPDATE d_destination
+                    SET country = ?
+                    WHERE destination_code = ?
+                    ''', (country, destination_code))
+
+            # Provide a useful message for the user that they have changed the destination information.
+            print("You have updated the destination information for ", destination_code, "the row now contains:")
+
+            # Look up the destination_code again to return the updated information to the user.
+            cursor.execute(_DESTINATION_LOOKUP, (destination_code,))
+            _print_kv_row(DEST_HEADERS, cursor.fetchone())
+
+        # If there is an error e.g. the destination code didn't exist, the user receives an indication.
+        except ValueError as ve:
+            print(f"Please check your inputs, there is an error {ve}.")
+
+
+@lru_cache(maxsize=1)
+def _summary_counts():
+    """ Reads the data for all three summaries (flights without a pilot, flights per pilot and flights per destination)
+    in one read transaction. The result is cached and reused until clear_summary_cache() is called, which every
+    function that changes the schedule, pilots or destinations does once its change is committed. Returns the count of
+    flights without a pilot and the printed lines for each pilot and each destination.
+    """
+    with get_conn(read_only=True) as (connection, cursor):
+        # Read every summary from the same snapshot of the database.
+        cursor.execute("BEGIN DEFERRED")
+
+        # Execute a query to count how many rows in the f_schedule fact table have a null for the pilot_id value.
+        cursor.execute('''
+            SELECT COUNT(*)
+            FROM f_schedule 
+            WHERE pilot_id IS null
+            ''')
+        unassigned = cursor.fetchone()[0]
+
+        # Execute the query to return pilot information and count of flights each pilot has (where a pilot has
+        # flights). The counts come from the v_pilot_counts view and SQLite formats each line with printf.
+        cursor.execute('''
+            SELECT printf('-Pilot ID %s is %s %s and has been assigned to %d flight(s).',
+            pc.pilot_id, dp.first_name, dp.last_name, pc.flight_count)
+            FROM v_pilot_counts pc
+            LEFT JOIN d_pilot dp ON pc.pilot_id = dp.pilot_id
+            ORDER BY pc.pilot_id
+            ''')
+        pilot_lines = tuple(line for (line,) in cursor)
+
+        # Create the query to return the number of 'scheduled' flights for each arrival destination, with SQLite
+        # formatting each line with printf. The flights are counted per arrival destination code first, so the
+        # destination details are only looked up once per destination rather than once per flight.
+        cursor.execute('''
+            SELECT printf('-The destination airport %s in %s, %s is served by %d flight(s) '
+            || 'with a ''scheduled'' status.',
+            dd.airport_name, dd.city, dd.country, sc.flight_count)
+            FROM (
+                SELECT df.arrival_destination_code, COUNT(*) AS flight_count
+                FROM f_schedule fs
+                JOIN d_flight df ON fs.flight_id = df.flight_id
+                WHERE fs.status = 'scheduled'
+                GROUP BY df.arrival_destination_code
+            ) sc
+            JOIN d_destination dd ON sc.arrival_destination_code = dd.destination_code
+            ORDER BY dd.airport_name DESC
+            ''')
+        destination_lines = tuple(line for (line,) in cursor)
+
+        # End the read transaction.
         connection.commit()
 
-        # Provide a useful message for the user that they have changed the destination information.
-        print("You have updated the destination information for ", destination_code, "the row now contains:")
+    return unassigned, pilot_lines, destination_lines
 
-        # Call the fetch_destination function with the destination_code to return the updated information to the user.
-        fetch_destinations(destination_code=destination_code)
 
-    # If there is an error e.g. the destination code didn't exist, the user receives an indication.
-    except ValueError as ve:
-        print(f"Please check your inputs, there is an error {ve}.")
-
-    # Close the database connection and the cursor.
-    close_connection(connection, cursor)
-
-
-def unassigned_flights():
-    """ Function call returns to the user the number of flights that are in the fact table where no pilot id exists."""
-    # Create a connection to the database and a cursor object.
-    connection, cursor = open_connection()
-
-    # Execute a query to count how many rows in the f_schedule fact table have a null for the pilot_id value.
-    cursor.execute('''
-        SELECT COUNT(schedule_id)
-        FROM f_schedule 
-        WHERE pilot_id IS null
-        ''')
-    # Fetch the result.
-    result = cursor.fetchone()[0]
+def clear_summary_cache():
+    """ Discards the cached summaries, so the next summary reads the database again. Call after committing any change
+    to the schedule, pilots or destinations.
+    """
+    _summary_counts.cache_clear()
 
-    # Close the connection and the cursor.
-    close_connection(connection, cursor)
 
+def _print_unassigned_flights(result):
+    """ Prints the count of scheduled flights with no pilot id for the user."""
     # Return the count to the user, with correct grammar.
     if result == 0:
         print("No scheduled flights are lacking an assigned pilot.\n")
@@ -543,57 +806,55 @@ def unassigned_flights():
         print("There are", result, "scheduled flights which do not have a pilot assigned to them.\n")
 
 
+def _print_flights_per_pilot(lines):
+    """ Prints the count of flights allocated to each pilot for the user."""
+    # Print a header to explain to the user what information will be displayed.
+    print("Summarising the number of scheduled flights assigned to pilots:")
+    # Print the line for each pilot.
+    for line in lines:
+        print(line)
+
+
+def _print_flights_per_destination(lines):
+    """ Prints the count of 'scheduled' flights for each arrival destination for the user."""
+    # Inform the user what they are being presented with.
+    print("Summarising the number of flights for each arrival destination (with a status of 'scheduled':")
+    # Print the line for each arrival destination.
+    for line in lines:
+        print(line)
+
+
+def unassigned_flights():
+    """ Function call returns to the user the number of flights that are in the fact table where no pilot id exists."""
+    # Print the count of flights without a pilot, read from the database unless it is cached.
+    _print_unassigned_flights(_summary_counts()[0])
+
+
 def flights_per_pilot():
     """ Function call to count how many flights pilots have been allocated to on the fact table f_schedule. Does not
     return pilot_IDs with no flights.
     """
-    # Create a connection to the database and a cursor object.
-    connection, cursor = open_connection()
-
-    # Execute the query to return pilot information and count of flights each pilot has (where a pilot has flights).
-    cursor.execute('''
-        SELECT fs.pilot_id, dp.first_name, dp.last_name, COUNT(fs.schedule_id) AS "Flight Count"
-        FROM f_schedule fs 
-        LEFT JOIN d_pilot dp ON fs.pilot_id = dp.pilot_id
-        WHERE fs.pilot_id IS NOT NULL
-        GROUP BY fs.pilot_id, dp.first_name, dp.last_name
-        ''')
-    # Fetch all rows from the database.
-    result = cursor.fetchall()
-    # Close the connection and cursor safely.
-    close_connection(connection, cursor)
-
-    # Print a header to explain to the user what information will be displayed.
-    print("Summarising the number of scheduled flights assigned to pilots:")
-    # Print pilot information and count of flights for each pilot neatly.
-    for pilot_id, first_name, last_name, count in result:
-        print(f"-Pilot ID", pilot_id, "is", first_name, last_name, "and has been assigned to", count, "flight(s).")
+    # Print the flights for each pilot, read from the database unless they are cached.
+    _print_flights_per_pilot(_summary_counts()[1])
 
 
 def flights_per_destination():
     """ Function call to return how many flights have a 'scheduled' status in the f_schedule fact table for each
     arrival destination. Returns a count for each arrival destination."""
-    # Open a database connection and create a cursor object.
-    connection, cursor = open_connection()
-
-    # Create the query to return the number of 'scheduled' flights for each arrival destination.
-    cursor.execute('''
-        SELECT dd2.airport_name, dd2.city, dd2.country, COUNT(fs.schedule_id) AS "Flight Count"
-        FROM f_schedule fs 
-        LEFT JOIN d_flight df ON fs.flight_id = df.flight_id
-        LEFT JOIN d_destination dd1 on df.departure_destination_code = dd1.destination_code
-        LEFT JOIN d_destination dd2 on df.arrival_destination_code = dd2.destination_code
-        WHERE fs.status = "scheduled"
-        GROUP BY dd2.airport_name
-        ORDER BY dd2.airport_name DESC
-        ''')
-    # Fetch all rows from the database.
-    result = cursor.fetchall()
-    # Safely close the database connection and cursor object.
-    close_connection(connection, cursor)
-    # Inform the user what they are being presented with.
-    print("Summarising the number of flights for each arrival destination (with a status of 'scheduled':")
-    # For each row, neatly print the details for each arrival destination.
-    for destination_airport_name, city, country, count in result:
-        print(f"-The destination airport {destination_airport_name} in {city}, {country} is served by {count} flight(s)"
-              f" with a 'scheduled' status.")
+    # Print the 'scheduled' flights for each arrival destination, read from the database unless they are cached.
+    _print_flights_per_destination(_summary_counts()[2])
+
+
+def summary_report(headings=("\nNumber of flights without a pilot:", "\nNumber of flights per pilot:",
+                             "\nNumber of flights per destination:")):
+    """ Function call to print all three summaries (flights without a pilot, flights per pilot and flights per
+    destination), each after its heading in headings. The summaries are read together in one transaction, so they all
+    describe the same state of the database, and are cached until the next change to the database."""
+    unassigned, pilot_lines, destination_lines = _summary_counts()
+
+    print(headings[0])
+    _print_unassigned_flights(unassigned)
+    print(headings[1])
+    _print_flights_per_pilot(pilot_lines)
+    print(headings[2])
+    _print_flights_per_destination(destination_lines)
@@ -1,9 +1,24 @@
 """ Command Line Interface for the flight.db database application. """
 
+# Import atexit to close the database connections however the application ends.
+import atexit
+
 # Import function that sets off the application.
 from database_application import welcome_message
+# Import function that closes the pooled database connections.
+from database_queries import close_pool
+
+# Close the pooled connections when the interpreter exits, e.g. after exit() in the quit option.
+atexit.register(close_pool)
 
 # Create a continuous loop for the database to run continuously.
 application_running = True
-while application_running:
-    welcome_message()
+try:
+    while application_running:
+        welcome_message()
+# Stop cleanly if the user presses Ctrl+C or the input ends.
+except (KeyboardInterrupt, EOFError):
+    print("\nExiting. Re-run the application should you wish to access the database later.")
+# Release the pooled database connections.
+finally:
+    close_pool()
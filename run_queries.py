@@ -1,86 +1,262 @@
 """
 Module to run the queries to address 'SQL Queries and Database Interaction'.
-Includes function calls to fetch information (fetch_flights, fetch_pilots, fetch_destinations) to modify information
-(modify_schedule, modify_destination), to assign pilots to flights (assign_pilot). Also includes function calls to
-fetch summary data (unassigned_flights, flights_per_pilot, flights_per_destination).
+Includes function calls to fetch information (fetch_flights_multi, iter_flights, iter_pilots, fetch_destinations) to
+modify information (modify_schedule, modify_destination), to assign pilots to flights (assign_pilot). Also includes
+function calls to fetch summary data (summary_report). The calls are listed as the steps of PLAN and run by
+execute_plan, which runs groups of calls on one shared connection with run_batch, at the same time on separate
+connections with run_parallel, or as one query with run_flight_searches.
 """
 
 # Import the function calls from database_queries.
-from database_queries import fetch_flights
-from database_queries import fetch_pilots
+from database_queries import fetch_flights_multi
+from database_queries import iter_flights
+from database_queries import print_flights
+from database_queries import iter_pilots
+from database_queries import print_pilots
 from database_queries import fetch_destinations
 from database_queries import modify_schedule
 from database_queries import modify_destination
 from database_queries import assign_pilot
-from database_queries import unassigned_flights
-from database_queries import flights_per_pilot
-from database_queries import flights_per_destination
+from database_queries import summary_report
+from database_queries import get_conn
+from database_queries import transaction
+# import the thread pool to run independent read queries at the same time
+from concurrent.futures import ThreadPoolExecutor
+# import groupby and itemgetter to group plan steps and to split the combined flight search results by search
+from itertools import groupby
+from operator import itemgetter
+# import sys to buffer the output
+import sys
+
+
+def _read_rows(function, arguments):
+    """ Runs one read in a worker thread and returns all its rows as a list."""
+    return list(function(**arguments))
+
+
+def run_batch(calls, cursor):
+    """ Runs a list of calls on one shared cursor instead of one connection per call. Each call is a (heading,
+    function, keyword arguments) tuple: the heading is printed, then the function is called with the shared cursor.
+    Each function must accept a cursor keyword argument.
+    """
+    for heading, function, arguments in calls:
+        print(heading)
+        function(cursor=cursor, **arguments)
+
+
+def run_parallel(calls, max_workers=4):
+    """ Runs a list of independent reads at the same time, each on its own pooled connection (SQLite releases the GIL
+    while a query runs, and WAL lets the readers work side by side). Each call is a (heading, read function, print
+    function, keyword arguments) tuple: the read function (e.g. iter_pilots) runs in a worker thread and returns the
+    rows, which are then printed from the main thread with the print function (e.g. print_pilots) after the heading,
+    in the order of the list.
+    """
+    # Run the reads in worker threads, which only fetch rows and don't print.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_read_rows, read, arguments) for _, read, _, arguments in calls]
+        results = [future.result() for future in futures]
+
+    # Print the rows of each call in order.
+    for (heading, _, show, _), rows in zip(calls, results):
+        print(heading)
+        show(rows)
+
+
+# Steps of the demo, as (action, table, heading, arguments) tuples, in the order they are run. The heading of a
+# "section" step is printed on its own, the other headings are printed before the step's output. Consecutive steps
+# with the same action and table are run together by execute_plan.
+PLAN = [
+    # Carefully fetch flight information, based on multiple criteria.
+    ("section", None, "\n1) Retrieve flights based on multiple criteria (flight number, city, status, departure date).",
+     None),
+    ("fetch", "flights", "\n1a) Flight retrieval -> Retrieving flights based on flight number being 'SI2203'.",
+     {"flight_number": "SI2203"}),
+    ("fetch", "flights", "\n1b) Flight retrieval -> Retrieving flights based on departure city being 'Jersey'.",
+     {"departure_city": "Jersey"}),
+    ("fetch", "flights", "\n1c) Flight retrieval -> Retrieving flights based on arrival city being 'Southampton'.",
+     {"arrival_city": "Southampton"}),
+    ("fetch", "flights", "\n1d) Flight retrieval -> Retrieving flights based on flight status being 'landed'.",
+     {"flight_status": "landed"}),
+    ("fetch", "flights", "\n1e) Flight retrieval -> Retrieving flights based on departure date being '21 April 2025'.",
+     {"departure_date": "2025-04-21"}),
+    # 1f (departure city 'Jersey' and departure date '21 April 2025') is the flights found by both 1b and 1e, named by
+    # their filters, so it doesn't need a query of its own.
+    ("fetch", "flights", "\n1f) Flight retrieval -> Retrieving all flights based on departure city being 'Jersey' and "
+     "departure date being '21 April 2025'.",
+     ({"departure_city": "Jersey"}, {"departure_date": "2025-04-21"})),
+    ("fetch", "flights", "\n1g) Flight retrieval -> Retrieving all flights, regardless of whether they have been "
+     "scheduled or are missing a pilot.",
+     {}),
+
+    # Carefully make several changes to schedules, based on multiple criteria.
+    ("section", None, "\n\n2) Schedule Modification", None),
+    ("modify", "schedule", "\n2a) Schedule Modification -> Update flight schedules e.g. change departure time, arrival "
+     "time or status",
+     {"schedule_id": 2, "new_departure_time": "12:00"}),
+    ("modify", "schedule", "\n2b) Schedule Modification -> Update flight schedules e.g. change departure time, arrival "
+     "time or status",
+     {"schedule_id": 2, "new_arrival_time": "13:00"}),
+    ("modify", "schedule", "\n2c) Schedule Modification -> Update flight schedules e.g. change departure time, arrival "
+     "time or status",
+     {"schedule_id": 2, "new_status": "delayed"}),
+
+    # Carefully fetch pilot schedule information, based on multiple criteria.
+    ("section", None, "\n3) Retrieve information about pilot schedules.", None),
+    ("fetch", "pilots", "\n3a) Pilot schedule retrieval -> Retrieving schedule based on pilot ID being 'P0010001'.",
+     {"pilot_id": "P0010001"}),
+    ("fetch", "pilots", "\n3b) Retrieving schedule information for all pilots.",
+     {}),
+
+    # Carefully assign a pilot to a flight, including multiple mandatory criteria.
+    ("section", None, "\n4) Assigning pilots to flights. Please check the information carefully before completing the "
+     "change.", None),
+    ("assign", "schedule", None,
+     {"pilot_id": "P0010007", "flight_number": "SI2207", "departure_date": "2025-04-21", "departure_city": "Exeter",
+      "arrival_city": "Jersey", "verbose": True}),
+
+    # Carefully fetch destination information, based on multiple criteria. All the destinations are fetched first, so
+    # the search by country is served from the cached destinations.
+    ("section", None, "\n5) Retrieve information about destinations.", None),
+    ("fetch", "destinations", "\n5b) Retrieving information for all destinations.",
+     {}),
+    ("fetch", "destinations", "\n5a) Destination information retrieval -> Retrieving schedule for destination country "
+     "'England'.",
+     {"country": "England"}),
+
+    # Carefully modify destination information, based on one of three options each time.
+    ("section", None, "\n6) Destination management", None),
+    ("modify", "destinations", "\n6a) Destination Modification -> Update destination e.g. change airport name, city or "
+     "country.",
+     {"destination_code": "EMA", "airport_name": "East Midlands Airport Central"}),
+    ("modify", "destinations", "\n6b) Destination Modification -> Update destination e.g. change airport name, city or "
+     "country.",
+     {"destination_code": "BRS", "city": "Paris"}),
+    ("modify", "destinations", "\n6c) Destination Modification -> Update destination e.g. change airport name, city or "
+     "country.",
+     {"destination_code": "DUB", "city": "Dubline"}),
+
+    # Carefully fetch useful flight summary information.
+    ("section", None, "\n\n\n7) Additional queries that summarise data:", None),
+    ("summary", None, None,
+     {"headings": ("\n7a) Number of flights without a pilot:", "\n7b) Number of flights per pilot:",
+                   "\n7c) Number of flights per destination:")}),
+]
+
+# The function that runs each (action, table) of a plan step, for the steps run through run_batch.
+_PLAN_FUNCTIONS = {
+    ("fetch", "destinations"): fetch_destinations,
+    ("modify", "schedule"): modify_schedule,
+    ("modify", "destinations"): modify_destination,
+    ("assign", "schedule"): assign_pilot,
+}
+
+# Tables whose fetch function keeps the rows it reads, so reads of them run in order on one connection and only the
+# first one queries the database.
+_CACHED_TABLES = {"destinations"}
+
+# The read and print functions for each table read with run_parallel.
+_PARALLEL_READS = {"pilots": (iter_pilots, print_pilots)}
+
+
+def run_flight_searches(searches, cursor):
+    """ Runs a list of (heading, search) flight searches and prints each search's flights after its heading, in the
+    order of the list. A search is either a dict of fetch_flights filters, or a tuple of the filter dicts of the
+    searches in the list whose flights in common it shows (e.g. ({"departure_city": "Jersey"}, {"departure_date":
+    "2025-04-21"}) for the flights found by both of those searches). The searches with filters run together as one
+    UNION ALL query, and a search without filters is streamed as it is printed. Raises a ValueError if a combined search
+    names a search that isn't in the list with filters.
+    """
+    # Find the searches with filters, which are the only ones a combined search can name.
+    queried = [index for index, (_, search) in enumerate(searches) if isinstance(search, dict) and search]
+    filters = [searches[index][1] for index in queried]
+    for heading, search in searches:
+        if isinstance(search, tuple):
+            for part in search:
+                if part not in filters:
+                    raise ValueError(f"{heading.strip()} combines {part!r}, which isn't a search with filters in the "
+                                     f"list.")
+
+    # Run the searches with filters as one query and split the rows by search. After the search index, each row starts
+    # with the schedule and flight IDs that identify it.
+    flight_rows = fetch_flights_multi(filters, cursor=cursor)
+    rows_by_search = {index: [] for index in queried}
+    rows_by_search.update({queried[source]: [row[1:] for row in rows]
+                           for source, rows in groupby(flight_rows, itemgetter(0))})
+
+    # Work out each combined search from the rows its searches have in common, matched on the schedule and flight IDs
+    # and kept in the order of the first search.
+    for index, (_, search) in enumerate(searches):
+        if isinstance(search, tuple):
+            first, *others = (rows_by_search[queried[filters.index(part)]] for part in search)
+            others = [{row[:2] for row in rows} for rows in others]
+            rows_by_search[index] = [row for row in first if all(row[:2] in keys for keys in others)]
+
+    # Print each search's rows after its heading, without the IDs, streaming every flight for a search without
+    # filters.
+    for index, (heading, search) in enumerate(searches):
+        print(heading)
+        if search == {}:
+            print_flights(iter_flights(cursor=cursor))
+        else:
+            print_flights([row[2:] for row in rows_by_search[index]])
+
+
+def execute_plan(plan, cursor):
+    """ Runs a plan of (action, table, heading, arguments) steps, such as PLAN, on one shared cursor. Steps run in the
+    order of the plan, so a read is never moved past a write and always shows the data the plan expects. Consecutive
+    steps with the same action and table are run together: flight searches with run_flight_searches, other reads at
+    the same time with run_parallel (or in order for cached tables), and changes to one table in a single transaction.
+    """
+    for (action, table), steps in groupby(plan, itemgetter(0, 1)):
+        steps = list(steps)
+        calls = [(heading, _PLAN_FUNCTIONS.get((action, table)), arguments) for _, _, heading, arguments in steps]
+
+        # Print section headings.
+        if action == "section":
+            for heading, _, _ in calls:
+                print(heading)
+
+        # Run flight searches together, as one query where possible.
+        elif action == "fetch" and table == "flights":
+            run_flight_searches([(heading, arguments) for heading, _, arguments in calls], cursor)
+
+        # Read cached tables in order on the shared connection, and other tables at the same time.
+        elif action == "fetch" and table in _CACHED_TABLES:
+            run_batch(calls, cursor)
+        elif action == "fetch":
+            run_parallel([(heading, *_PARALLEL_READS[table], arguments) for heading, _, arguments in calls])
+
+        # Make changes to the same table in one transaction.
+        elif action == "modify":
+            with transaction(cursor):
+                run_batch(calls, cursor)
+
+        # Assign pilots one at a time, each assignment asks for confirmation before it takes the write lock.
+        elif action == "assign":
+            for heading, function, arguments in calls:
+                if heading is not None:
+                    print(heading)
+                function(cursor=cursor, **arguments)
+
+        # Print the summary report.
+        elif action == "summary":
+            for _, _, arguments in calls:
+                summary_report(**arguments)
+
+        else:
+            raise ValueError(f"Unknown plan step: {action} {table}")
 
 
 # Ensure this script only runs if this is the file is run directly
 if __name__ == "__main__":
-    # Carefully make several function calls to fetch flight information, based on multiple criteria.
-    print("\n1) Retrieve flights based on multiple criteria (flight number, city, status, departure date).\n")
-    print("1a) Flight retrieval -> Retrieving flights based on flight number being 'SI2203'.")
-    fetch_flights(flight_number="SI2203")  # retrieve flights based on multiple criteria: flight number
-    print("\n1b) Flight retrieval -> Retrieving flights based on departure city being 'Jersey'.")
-    fetch_flights(departure_city="Jersey")  # retrieve flights based on multiple criteria: departure destination
-    print("\n1c) Flight retrieval -> Retrieving flights based on arrival city being 'Southampton'.")
-    fetch_flights(arrival_city="Southampton")  # retrieve flights based on multiple criteria: arrival destination
-    print("\n1d) Flight retrieval -> Retrieving flights based on flight status being 'landed'.")
-    fetch_flights(flight_status="landed")  # retrieve flights based on multiple criteria: flight status
-    print("\n1e) Flight retrieval -> Retrieving flights based on departure date being '21 April 2025'.")
-    fetch_flights(departure_date="2025-04-21")  # retrieve flights based on multiple criteria: departure date
-    print("\n1f) Flight retrieval -> Retrieving all flights based on departure city being 'Jersey' and departure date"
-          " being '21 April 2025'.")
-    fetch_flights(departure_city="Jersey", departure_date="2025-04-21")  # retrieve flights based on multiple criteria
-    print("\n1g) Flight retrieval -> Retrieving all flights, regardless of whether they have been scheduled or are "
-          "missing a pilot.")
-    fetch_flights()  # retrieve flights based on multiple criteria: departure date
-    print("\n")
-
-    # Carefully make several function calls to modify schedules, based on multiple criteria.
-    print("2) Schedule Modification")
-    print("\n2a) Schedule Modification -> Update flight schedules e.g. change departure time, arrival time or status")
-    modify_schedule(schedule_id=2, new_departure_time="12:00")
-    print("\n2b) Schedule Modification -> Update flight schedules e.g. change departure time, arrival time or status")
-    modify_schedule(schedule_id=2, new_arrival_time="13:00")
-    print("\n2c) Schedule Modification -> Update flight schedules e.g. change departure time, arrival time or status")
-    modify_schedule(schedule_id=2, new_status="delayed")
-
-    # Carefully make several function calls to fetch pilot schedule information, based on multiple criteria.
-    print("\n3) Retrieve information about pilot schedules.")
-    print("\n3a) Pilot schedule retrieval -> Retrieving schedule based on pilot ID being 'P0010001'.")
-    fetch_pilots(pilot_id="P0010001")  # retrieve pilot schedule
-    print("\n3b) Retrieving schedule information for all pilots.")
-    fetch_pilots()  # retrieve pilot schedule
-
-    # Carefully make a function call to assign a pilot to a flight, including multiple mandatory criteria.
-    print("\n4) Assigning pilots to flights. Please check the information carefully before completing the change.")
-    assign_pilot("P0010007", "SI2207", "2025-04-21", "Exeter", "Jersey")
-
-    # Carefully make several function calls to fetch destination information, based on multiple criteria.
-    print("\n5) Retrieve information about destinations.")
-    print("\n5a) Destination information retrieval -> Retrieving schedule for destination country 'England'.")
-    fetch_destinations(country="England")  # retrieve destination information
-    print("\n5b) Retrieving information for all destinations.")
-    fetch_destinations()  # retrieve pilot schedule
-
-    # Carefully make several function calls to modify destination information, based on one of three options each time.
-    print("\n6) Destination management")
-    print("\n6a) Destination Modification -> Update destination e.g. change airport name, city or country.")
-    modify_destination(destination_code="EMA", airport_name="East Midlands Airport Central")
-    print("\n6b) Destination Modification -> Update destination e.g. change airport name, city or country.")
-    modify_destination(destination_code="BRS", city="Paris")
-    print("\n6c) Destination Modification -> Update destination e.g. change airport name, city or country.")
-    modify_destination(destination_code="DUB", city="Dubline")  # retrieve destination information
-    print("\n")
-
-    # Carefully make several function calls to fetch useful flight summary information.
-    print("\n7) Additional queries that summarise data:")
-    print("\n7a) Number of flights without a pilot:")
-    unassigned_flights()
-    print("\n7b) Number of flights per pilot:")
-    flights_per_pilot()
-    print("\n7c) Number of flights per destination:")
-    flights_per_destination()
+    # Buffer the output and write it in blocks rather than a line at a time, even on a terminal. input() still flushes
+    # the output before asking for the confirmation in section 4.
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
+
+    # Open one database connection for the whole script and run every step of the plan with its cursor.
+    with get_conn() as (connection, cursor):
+        execute_plan(PLAN, cursor)
+
+    # Write out anything still buffered.
+    sys.stdout.flush()